@@ -1,15 +1,54 @@
+import json
 import os
+import time
 import yaml
-from crewai import Agent
-from langchain_openai import ChatOpenAI
+from crewai import Agent, LLM
 from tools.custom_tool import UniwareAPITools, DataAnalysisTools, EmailTools, CleanupTools
+from tools.instrumentation import record_span
+from tools.llm_cache import LLMResponseCache, llm_cache_enabled
+
+class ReportLLM(LLM):
+    """crewai ``LLM`` that answers repeat prompts from the on-disk response cache.
+
+    crewai converts any other LLM object (e.g. a LangChain chat model) into its
+    own ``LLM`` from the model name alone, dropping its cache and callbacks, so
+    caching and the 'llm_call' spans both live in ``call``.
+    """
+
+    def __init__(self, model: str, response_cache: LLMResponseCache = None, **kwargs):
+        super().__init__(model=model, **kwargs)
+        self.response_cache = response_cache
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None):
+        # Function-calling turns run tools as a side effect, so only plain completions are cached
+        cacheable = self.response_cache is not None and not tools and not available_functions
+        prompt = json.dumps(messages, sort_keys=True) if cacheable else None
+        started = time.time()
+        if cacheable:
+            cached = self.response_cache.lookup(prompt, self.model)
+            if cached is not None:
+                record_span('llm_call', started, time.time() - started, model=self.model, cached=True)
+                return cached
+        try:
+            response = super().call(messages, tools=tools, callbacks=callbacks, available_functions=available_functions,
+                                    from_task=from_task, from_agent=from_agent)
+        except Exception as e:
+            record_span('llm_call', started, time.time() - started, model=self.model, cached=False,
+                        error=f"{type(e).__name__}: {e}")
+            raise
+        record_span('llm_call', started, time.time() - started, model=self.model, cached=False)
+        if cacheable and isinstance(response, str) and response:
+            self.response_cache.update(prompt, self.model, response)
+        return response
 
 class BusinessReportAgents:
     def __init__(self):
         with open('config/agents.yaml', 'r') as file:
             self.agents_config = yaml.safe_load(file)
         # UPDATED: Naye .env variable 'MODEL' ko use karein
-        self.llm = ChatOpenAI(model_name=os.getenv("MODEL", "gpt-4o"))
+        # Repeat prompts (same plan, new dates/paths) are answered from disk; the model name is part of the key
+        self.llm_cache = LLMResponseCache() if llm_cache_enabled() else None
+        self.llm = ReportLLM(os.getenv("MODEL", "gpt-4o"), response_cache=self.llm_cache)
 
     def downloader_agent(self):
         config = self.agents_config['downloader_agent']
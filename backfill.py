@@ -0,0 +1,127 @@
+"""
+Backfill runner: rebuilds Troveas_Report_<date>.xlsx for every day in a date
+range, e.g. after a data correction.
+
+The sale orders for the whole range are exported once (split into parallel
+date-range shards when UNIWARE_SHARD_DAYS is set) and parsed once, into one
+CSV slice per month of report columns. Each day's report is then built in a
+process pool from its month's slice only, with that day passed to the
+analysis as its as-of date instead of being derived from the clock. With
+rollups on, they are written from the slices in date order before the pool
+starts, and the workers only read them.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+
+import pandas as pd
+
+from tools.analysis import parse_created, report_chunks, report_columns
+from tools.columnar_cache import ColumnarCache, columnar_cache_enabled
+from tools.instrumentation import span
+from tools.rollup_store import rollups_enabled
+from tools.sales_cube import chunked_cube
+from tools.stages import DETAIL_BATCH_ROWS, StageError, analyze_report, export_window, fetch_orders, refresh_rollups
+from tools.uniware_client import UniwareClient
+
+
+def _analyze_day(data_path: str, output_dir: str, day: date) -> str:
+    # Runs in a worker process; the rollups were written beforehand, so workers only read them
+    return analyze_report(data_path, output_dir=output_dir, as_of=day, update_rollups=False)
+
+
+def split_by_month(data_path: str, directory: str, months: set) -> dict:
+    """Write the export's rows for each ``(year, month)`` in ``months`` to its own CSV; returns month -> path.
+
+    Every report's window lies within its own month, so a month's slice is all
+    a day's analysis needs. Rows without a parseable ``Created`` are dropped,
+    as the analysis never counts them; a month without orders gets a
+    header-only slice.
+    """
+    os.makedirs(directory, exist_ok=True)
+    columns = report_columns(pd.read_csv(data_path, nrows=0).columns)
+    stem = os.path.splitext(os.path.basename(data_path))[0]
+    paths = {}
+    for year, month in sorted(months):
+        paths[(year, month)] = os.path.join(directory, f"{stem}_{year:04d}-{month:02d}.csv")
+        pd.DataFrame(columns=columns).to_csv(paths[(year, month)], index=False)
+    for chunk in report_chunks(data_path, int(os.getenv("ANALYSIS_CHUNK_ROWS", "0")) or DETAIL_BATCH_ROWS):
+        created = parse_created(chunk['Created'])
+        for key, rows in chunk.groupby(created.dt.year * 100 + created.dt.month, sort=False):
+            path = paths.get(divmod(int(key), 100))
+            if path:
+                rows[columns].to_csv(path, mode='a', header=False, index=False)
+    return paths
+
+
+class BackfillRunner:
+    def __init__(self, start: date, end: date, output_dir: str = None, max_workers: int = None,
+                 client: UniwareClient = None):
+        if end < start:
+            raise StageError(f"Backfill range ends ({end}) before it starts ({start}).")
+        self.start = start
+        self.end = end
+        self.output_dir = output_dir or os.getenv("BACKFILL_DIR", os.path.join('reports', 'backfill'))
+        self.max_workers = max_workers or int(os.getenv("BACKFILL_WORKERS", "0")) or os.cpu_count() or 1
+        self.client = client
+
+    def days(self) -> list:
+        return [self.start + timedelta(days=offset) for offset in range((self.end - self.start).days + 1)]
+
+    def fetch(self) -> str:
+        """Export every order any report in the range needs, in one job (or one set of shards)."""
+        client = self.client or UniwareClient()
+        if not client.tokens.username or not client.tokens.password:
+            raise StageError("UNIWARE_USERNAME or UNIWARE_PASSWORD not found in .env file. Please add your Uniware credentials.")
+        client.authenticate()
+
+        window_start, _ = export_window(self.start)
+        _, window_end = export_window(self.end)
+        os.makedirs(self.output_dir, exist_ok=True)
+        filename = os.path.join(self.output_dir, f"uniware_sales_{self.start:%Y-%m-%d}_{self.end:%Y-%m-%d}.csv")
+        print(f"📋 Exporting sales {window_start:%Y-%m-%d}..{window_end:%Y-%m-%d} for {len(self.days())} report(s)...")
+        return fetch_orders(client, window_start, window_end, filename)
+
+    def run(self, data_path: str = None) -> dict:
+        """Returns ``{day: report path or exception}``; one day failing never stops the others.
+
+        ``data_path`` reuses an export that is already on disk instead of fetching.
+        """
+        with span('backfill.fetch', days=len(self.days())) as attrs:
+            data_path = data_path or self.fetch()
+            attrs['bytes'] = os.path.getsize(data_path)
+        days = self.days()
+        with span('backfill.split') as attrs:
+            # Parse once here; every worker then reads only its month's slice
+            slices = split_by_month(data_path, self.output_dir, {(day.year, day.month) for day in days})
+            attrs['months'] = len(slices)
+            if columnar_cache_enabled():
+                # Room for every slice, so building one never evicts another the workers need
+                cache = ColumnarCache.for_output_dir(self.output_dir, max_files=len(slices) + 1)
+                for path in slices.values():
+                    cache.ensure(path)
+        if rollups_enabled():
+            # Written serially in date order before any report reads them, so every day's
+            # comparison columns see the same rollups whichever worker finishes first
+            with span('backfill.rollups', months=len(slices)) as attrs:
+                attrs['rows'] = 0
+                for (year, month), path in sorted(slices.items()):
+                    last_day = max(day for day in days if (day.year, day.month) == (year, month))
+                    cube = chunked_cube(path, last_day, date(year, month, 1), DETAIL_BATCH_ROWS)
+                    attrs['rows'] += refresh_rollups(cube, self.output_dir)
+
+        results = {}
+        with span('backfill.analysis', days=len(days), workers=min(self.max_workers, len(days))):
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(days))) as pool:
+                futures = {pool.submit(_analyze_day, slices[(day.year, day.month)], self.output_dir, day): day
+                           for day in days}
+                for future in as_completed(futures):
+                    day = futures[future]
+                    try:
+                        results[day] = future.result()
+                        print(f"✅ [{day}] Report created: {results[day]}")
+                    except Exception as e:
+                        results[day] = e
+                        print(f"❌ [{day}] {e}")
+        return results
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: legacy multi-pass channel summary vs the single-pass aggregation core.
+
+Usage: python -m benchmarks.bench_aggregation --rows 1000000
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_orders
+from tools.analysis import build_report, channel_totals
+
+
+def legacy_report(df: pd.DataFrame, previous_day: datetime, start_of_month: datetime) -> pd.DataFrame:
+    """The pre-refactor DataAnalysisTools logic, kept here as the baseline."""
+    df['Order Date'] = pd.to_datetime(df['Created'], errors='coerce')
+    df_filtered = df.dropna(subset=['Order Date']).copy()
+    df_filtered['Channel Name'] = df_filtered['Channel Name'].astype(str).str.strip()
+    normalized = df_filtered['Sale Order Status'].fillna('').astype(str).str.strip().str.lower()
+    df_filtered = df_filtered[~normalized.isin(['', 'cancelled', 'unfulfillable'])].copy()
+    normalized = df_filtered['SOI Status'].fillna('').astype(str).str.strip().str.lower()
+    df_filtered = df_filtered[~normalized.isin(['cancelled'])].copy()
+    normalized = df_filtered['Shipping Package Status Code'].fillna('').astype(str).str.strip().str.lower()
+    df_filtered = df_filtered[~normalized.isin(['returned'])].copy()
+
+    daily_df = df_filtered[df_filtered['Order Date'].dt.date == previous_day.date()]
+    daily = daily_df.groupby('Channel Name').agg(Qty=('Sale Order Code', 'count'), Amt=('Total Price', 'sum')).reset_index()
+    mtd_df = df_filtered[(df_filtered['Order Date'].dt.date >= start_of_month.date()) & (df_filtered['Order Date'].dt.date <= previous_day.date())]
+    mtd = mtd_df.groupby('Channel Name').agg(Qty=('Sale Order Code', 'count'), Amt=('Total Price', 'sum')).reset_index()
+    report = pd.merge(daily, mtd, on='Channel Name', how='outer',
+                      suffixes=(f'_{previous_day.strftime("%d-%m-%Y")}', '_MTD')).fillna(0)
+    totals = {col: report[col].sum() for col in report.columns if col != 'Channel Name'}
+    totals['Channel Name'] = 'Grand Total'
+    return pd.concat([report, pd.DataFrame([totals])], ignore_index=True)
+
+
+def best_of(fn, repeat: int) -> tuple:
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    previous_day = datetime(2026, 10, 16, 9)
+    start_of_month = previous_day.replace(day=1)
+    orders = synthetic_orders(args.rows, previous_day + timedelta(days=1))
+    print(f"Synthetic export: {len(orders):,} rows")
+
+    legacy_time, legacy = best_of(lambda: legacy_report(orders.copy(), previous_day, start_of_month), args.repeat)
+    core_time, core = best_of(lambda: build_report(channel_totals(orders, previous_day, start_of_month), previous_day), args.repeat)
+
+    pd.testing.assert_frame_equal(legacy, core, check_dtype=False)
+    print(f"legacy multi-pass : {legacy_time:8.3f} s")
+    print(f"single-pass core  : {core_time:8.3f} s")
+    print(f"speed-up          : {legacy_time / core_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
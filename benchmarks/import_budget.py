@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Import-time budget for the modules every run loads before any work starts.
+
+Imports the entry points in a fresh interpreter under ``python -X importtime``
+and fails (exit 1) when their cumulative import time exceeds the budget or
+when any heavy dependency is loaded eagerly; those must stay deferred to the
+stage that needs them.
+
+Usage: python -m benchmarks.import_budget [--budget-ms 150]
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_MODULES = ['main', 'pipeline', 'scheduler', 'tools.stages']
+DEFERRED_MODULES = ['pandas', 'numpy', 'pyarrow', 'openpyxl', 'requests', 'yaml', 'crewai', 'langchain_openai']
+LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)')
+
+
+def measure() -> tuple:
+    """Cumulative import time in ms of each entry module, plus the deferred modules that got loaded."""
+    code = (
+        "import json, sys\n"
+        + "".join(f"import {name}\n" for name in ENTRY_MODULES)
+        + f"print(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules]))"
+    )
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=REPO_ROOT,
+                               capture_output=True, text=True, check=True)
+    timings = {}
+    for line in completed.stderr.splitlines():
+        match = LINE.match(line)
+        # Only top-level entries (one space of indentation) are the modules imported by the snippet
+        if match and len(match.group(3)) == 1 and match.group(4) in ENTRY_MODULES:
+            timings[match.group(4)] = int(match.group(2)) / 1000
+    return timings, json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "150")))
+    args = parser.parse_args()
+
+    timings, loaded = measure()
+    total = sum(timings.values())
+    for name, ms in timings.items():
+        print(f"  {name:<14} {ms:>8.1f} ms")
+    print(f"  {'total':<14} {total:>8.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    failures = []
+    if total > args.budget_ms:
+        failures.append(f"import time {total:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+    if loaded:
+        failures.append(f"heavy modules imported at startup: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        raise SystemExit(1)
+    print("✅ Import budget met")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Local stand-in for the Uniware endpoints the downloader uses.
+
+Serves /oauth/token, /services/rest/v1/export/job/create,
+/services/rest/v1/export/job/status and /files/<job>.csv (with gzip and
+byte-range support) from a pre-generated export. Point the client at it with
+UNIWARE_BASE_URL=http://127.0.0.1:<port>.
+"""
+
+import gzip
+import http.server
+import json
+import os
+import threading
+import time
+import uuid
+
+
+class MockUniwareServer:
+    def __init__(self, export_path: str, host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0.0, job_seconds: float = 1.0, gzip_files: bool = True):
+        self.export_path = export_path
+        self.latency = latency
+        self.job_seconds = job_seconds
+        self.gzip_files = gzip_files
+        self.jobs = {}
+        self.requests = []
+        self._payload = None
+        self._server = http.server.ThreadingHTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def file_payload(self) -> bytes:
+        if self._payload is None:
+            with open(self.export_path, 'rb') as f:
+                data = f.read()
+            self._payload = gzip.compress(data, compresslevel=1) if self.gzip_files else data
+        return self._payload
+
+    def start(self) -> 'MockUniwareServer':
+        if self.gzip_files:
+            self.file_payload()  # compress up front so it is not timed as server latency
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler(self):
+        mock = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, body: dict, status: int = 200):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _delay(self):
+                mock.requests.append((time.time(), self.command, self.path.split('?')[0]))
+                if mock.latency:
+                    time.sleep(mock.latency)
+
+            def do_GET(self):
+                self._delay()
+                if self.path.startswith('/oauth/token'):
+                    return self._json({'access_token': uuid.uuid4().hex, 'refresh_token': uuid.uuid4().hex,
+                                       'token_type': 'bearer', 'expires_in': 43199})
+                if self.path.startswith('/files/'):
+                    return self._file()
+                self._json({'error': 'not found'}, 404)
+
+            def do_POST(self):
+                self._delay()
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                if self.path.endswith('/export/job/create'):
+                    job_code = uuid.uuid4().hex[:12]
+                    mock.jobs[job_code] = time.monotonic() + mock.job_seconds
+                    return self._json({'successful': True, 'jobCode': job_code})
+                if self.path.endswith('/export/job/status'):
+                    ready_at = mock.jobs.get(body.get('jobCode'))
+                    if ready_at is None:
+                        return self._json({'successful': False, 'status': 'FAILED'})
+                    if time.monotonic() < ready_at:
+                        return self._json({'successful': True, 'status': 'RUNNING'})
+                    return self._json({'successful': True, 'status': 'COMPLETE',
+                                       'filePath': f"{mock.base_url}/files/{body['jobCode']}.csv"})
+                self._json({'error': 'not found'}, 404)
+
+            def _file(self):
+                payload = mock.file_payload()
+                start = 0
+                range_header = self.headers.get('Range')
+                if range_header and range_header.startswith('bytes='):
+                    start = int(range_header[len('bytes='):].split('-')[0])
+                body = payload[start:]
+                self.send_response(206 if range_header else 200)
+                self.send_header('Content-Type', 'text/csv')
+                self.send_header('Accept-Ranges', 'bytes')
+                self.send_header('Content-Length', str(len(body)))
+                if range_header:
+                    self.send_header('Content-Range', f"bytes {start}-{len(payload) - 1}/{len(payload)}")
+                if mock.gzip_files:
+                    self.send_header('Content-Encoding', 'gzip')
+                self.end_headers()
+                view = memoryview(body)
+                for offset in range(0, len(view), 1024 * 1024):
+                    self.wfile.write(view[offset:offset + 1024 * 1024])
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the mock Uniware API in the foreground.")
+    parser.add_argument('export_path')
+    parser.add_argument('--port', type=int, default=8780)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument('--job-seconds', type=float, default=1.0, help="seconds until an export job completes")
+    args = parser.parse_args()
+    server = MockUniwareServer(os.path.abspath(args.export_path), port=args.port,
+                               latency=args.latency, job_seconds=args.job_seconds).start()
+    print(f"Mock Uniware listening on {server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
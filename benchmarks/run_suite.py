@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+"""
+End-to-end benchmark of the report stages against local stand-ins.
+
+Generates synthetic exports, serves them from the mock Uniware API, sends the
+report to the local SMTP sink, and times each stage with peak RSS. Each size
+runs in a fresh subprocess so memory peaks are not inherited between sizes.
+Results are written to benchmarks/results/<timestamp>.json.
+
+Usage: python -m benchmarks.run_suite --sizes 10k 100k 1m [--latency 0.05 --job-seconds 2]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # POSIX only; on Windows peak RSS is not recorded
+    resource = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'data')
+RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = []
+
+    def run(self, name: str, fn, *args, **kwargs):
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.stages.append({
+            'stage': name,
+            'seconds': round(time.perf_counter() - started, 4),
+            'peak_rss_mb': peak_rss_mb(),
+        })
+        peak = self.stages[-1]['peak_rss_mb']
+        peak_text = f"{peak:>8.1f} MB" if peak is not None else "     n/a"
+        print(f"  {name:<12} {self.stages[-1]['seconds']:>9.3f} s   peak RSS {peak_text}")
+        return result
+
+
+def run_single(size: str, args) -> dict:
+    """Run every stage once for one export size; called inside the per-size subprocess."""
+    from benchmarks.mock_uniware import MockUniwareServer
+    from benchmarks.smtp_sink import SMTPSink
+    from benchmarks.synthetic import SIZES, write_export
+
+    export_path = os.path.join(DATA_DIR, f"uniware_sales_{size}.csv")
+    if not os.path.exists(export_path):
+        print(f"  generating {SIZES[size]:,} rows -> {export_path}")
+        write_export(export_path, SIZES[size], datetime.now())
+
+    workdir = tempfile.mkdtemp(prefix=f"bench_{size}_")
+    os.makedirs(os.path.join(workdir, 'knowledge'))
+    with open(os.path.join(workdir, 'knowledge', 'user_preference.txt'), 'w', encoding='utf-8') as f:
+        f.write("report@example.com\ncc@example.com\n")
+
+    with MockUniwareServer(export_path, latency=args.latency, job_seconds=args.job_seconds) as api, \
+            SMTPSink(latency=args.latency) as smtp:
+        os.environ.update({
+            'UNIWARE_BASE_URL': api.base_url,
+            'UNIWARE_USERNAME': 'bench', 'UNIWARE_PASSWORD': 'bench',
+            'UNIWARE_TOKEN_CACHE': os.path.join(workdir, 'token_cache.json'),
+            'UNIWARE_POLL_HISTORY': os.path.join(workdir, 'poll_history.jsonl'),
+            'UNIWARE_POLL_FIRST_PROBE': '0.2',
+            'ANALYSIS_CACHE_DIR': os.path.join(workdir, '.analysis_cache'),
+            'EMAIL_ADDRESS': 'bench@example.com', 'EMAIL_PASSWORD': 'bench',
+            'SMTP_HOST': smtp.address[0], 'SMTP_PORT': str(smtp.address[1]), 'SMTP_STARTTLS': '0',
+        })
+        os.chdir(workdir)
+        sys.path.insert(0, REPO_ROOT)
+        from tools.analysis import export_request
+        from tools.stages import analyze_report, cleanup_files, export_window, send_report_email
+        from tools.uniware_client import UniwareClient
+
+        timer = StageTimer()
+        client = UniwareClient()
+        month_start, window_end = export_window()
+        filename = f"uniware_sales_{datetime.now().strftime('%Y-%m-%d')}.csv"
+        timer.run('auth', client.authenticate)
+        job_code = timer.run('job_create', client.create_export_job, month_start, window_end, *export_request())
+        report_url = timer.run('job_poll', client.get_report_url, job_code, (window_end - month_start).days)
+        data_path = timer.run('download', client.download_report, report_url, filename)
+        download_bytes = os.path.getsize(data_path)
+        report_path = timer.run('analysis', analyze_report, data_path)
+        timer.run('email', send_report_email, report_path)
+        timer.run('cleanup', cleanup_files)
+        os.chdir(REPO_ROOT)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'size': size,
+        'rows': SIZES[size],
+        'export_bytes': download_bytes,
+        'wire_bytes': len(api.file_payload()),
+        'api_requests': len(api.requests),
+        'emails': len(smtp.messages),
+        'total_seconds': round(sum(stage['seconds'] for stage in timer.stages), 4),
+        'stages': timer.stages,
+    }
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import pandas as pd
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', default=['10k', '100k', '1m'], choices=['10k', '100k', '1m', '10m'])
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every mock API/SMTP reply")
+    parser.add_argument('--job-seconds', type=float, default=1.0, help="seconds until a mock export job completes")
+    parser.add_argument('--output', help="results file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--single', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_single(args.single, args)), flush=True)
+        return
+
+    results = []
+    for size in args.sizes:
+        print(f"▶ {size}")
+        command = [sys.executable, '-m', 'benchmarks.run_suite', '--single', size,
+                   '--latency', str(args.latency), '--job-seconds', str(args.job_seconds)]
+        completed = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True)
+        lines = completed.stdout.strip().splitlines()
+        print("\n".join(line for line in lines[:-1] if line.startswith('  ')))
+        if completed.returncode != 0:
+            print(completed.stderr)
+            raise SystemExit(f"Benchmark for {size} failed")
+        results.append(json.loads(lines[-1]))
+
+    record = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'config': {'latency': args.latency, 'job_seconds': args.job_seconds},
+        'environment': environment(),
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=2)
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Minimal local SMTP sink that accepts any login and discards (but counts) messages.
+
+Point the email stage at it with SMTP_HOST=127.0.0.1 SMTP_PORT=<port> SMTP_STARTTLS=0.
+"""
+
+import socketserver
+import threading
+import time
+
+
+class SMTPSink:
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0):
+        self.latency = latency
+        self.messages = []
+        self._server = socketserver.ThreadingTCPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self) -> tuple:
+        return self._server.server_address[:2]
+
+    def start(self) -> 'SMTPSink':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler(self):
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line: str):
+                if sink.latency:
+                    time.sleep(sink.latency)
+                self.wfile.write(line.encode() + b"\r\n")
+
+            def handle(self):
+                envelope = {'from': None, 'to': []}
+                self.reply("220 smtp-sink ready")
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode(errors='replace').strip()
+                    verb = command.split(' ', 1)[0].upper()
+                    if verb in ('EHLO', 'HELO'):
+                        self.wfile.write(b"250-smtp-sink\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+                    elif verb == 'AUTH':
+                        if command.upper().startswith('AUTH LOGIN'):
+                            self.reply("334 VXNlcm5hbWU6")
+                            self.rfile.readline()
+                            self.reply("334 UGFzc3dvcmQ6")
+                            self.rfile.readline()
+                        self.reply("235 2.7.0 Authentication successful")
+                    elif verb == 'MAIL':
+                        envelope = {'from': command[10:].strip(), 'to': []}
+                        self.reply("250 OK")
+                    elif verb == 'RCPT':
+                        envelope['to'].append(command[8:].strip())
+                        self.reply("250 OK")
+                    elif verb == 'DATA':
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        size = 0
+                        while True:
+                            data_line = self.rfile.readline()
+                            if not data_line or data_line == b".\r\n":
+                                break
+                            size += len(data_line)
+                        sink.messages.append({**envelope, 'bytes': size, 'received_at': time.time()})
+                        self.reply("250 OK queued")
+                    elif verb in ('RSET', 'NOOP'):
+                        self.reply("250 OK")
+                    elif verb == 'QUIT':
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        self.reply("502 Command not implemented")
+
+        return Handler
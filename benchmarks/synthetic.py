@@ -0,0 +1,60 @@
+"""
+Synthetic Uniware "Sale Orders" exports with the headers DataAnalysisTools expects.
+"""
+
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from tools.fileio import atomic_path
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+
+CHANNELS = np.array(['AMAZON_IN', 'FLIPKART ', 'MYNTRA', ' AJIO', 'SHOPIFY', 'MEESHO', 'NYKAA_FASHION', 'CUSTOM'], dtype=object)
+ORDER_STATUSES = np.array(['COMPLETE', 'PROCESSING', 'CANCELLED', 'UNFULFILLABLE', ' complete ', None], dtype=object)
+ORDER_STATUS_WEIGHTS = [.6, .15, .1, .05, .05, .05]
+ITEM_STATUSES = np.array(['DELIVERED', 'DISPATCHED', 'CANCELLED', None], dtype=object)
+ITEM_STATUS_WEIGHTS = [.6, .25, .1, .05]
+PACKAGE_STATUSES = np.array(['DISPATCHED', 'DELIVERED', 'RETURNED', 'returned ', None], dtype=object)
+PACKAGE_STATUS_WEIGHTS = [.4, .4, .1, .05, .05]
+
+
+def synthetic_orders(rows: int, as_of: datetime, seed: int = 7, first_row: int = 0) -> pd.DataFrame:
+    """Order-item rows created between the 1st of ``as_of``'s month and ``as_of``.
+
+    Consecutive rows share a sale order code (two items per order), and a few
+    rows carry unparseable dates or missing channels like real exports do.
+    """
+    rng = np.random.default_rng(seed + first_row)
+    month_start = as_of.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    seconds = rng.integers(0, max((as_of - month_start).days, 1) * 86400, rows)
+    created = (pd.Timestamp(month_start) + pd.to_timedelta(seconds, unit='s')).strftime('%Y-%m-%d %H:%M:%S')
+    created = created.to_numpy(dtype=object)
+    created[rng.random(rows) < 0.0005] = 'N/A'
+    channels = CHANNELS[rng.integers(0, len(CHANNELS), rows)]
+    channels[rng.random(rows) < 0.0005] = np.nan
+    codes = np.arange(first_row, first_row + rows) // 2
+    return pd.DataFrame({
+        'Sale Order Code': np.char.add('SO', codes.astype(str)),
+        'Created': created,
+        'Channel Name': channels,
+        'Sale Order Status': ORDER_STATUSES[rng.choice(len(ORDER_STATUSES), rows, p=ORDER_STATUS_WEIGHTS)],
+        'SOI Status': ITEM_STATUSES[rng.choice(len(ITEM_STATUSES), rows, p=ITEM_STATUS_WEIGHTS)],
+        'Shipping Package Status Code': PACKAGE_STATUSES[rng.choice(len(PACKAGE_STATUSES), rows, p=PACKAGE_STATUS_WEIGHTS)],
+        'Total Price': np.round(rng.uniform(99, 4999, rows), 2),
+        'Currency': 'INR',
+    })
+
+
+def write_export(path: str, rows: int, as_of: datetime, seed: int = 7, chunk_rows: int = 500_000) -> str:
+    """Write a synthetic export CSV in chunks so even 10M rows fit in memory."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with atomic_path(path) as tmp_path:
+        for first_row in range(0, max(rows, 1), chunk_rows):
+            chunk = synthetic_orders(min(chunk_rows, rows - first_row), as_of, seed=seed, first_row=first_row)
+            chunk.to_csv(tmp_path, mode='a' if first_row else 'w', header=not first_row, index=False)
+    return path
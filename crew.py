@@ -1,6 +1,8 @@
 from crewai import Crew
 from agents import BusinessReportAgents
 from tasks import BusinessReportTasks
+import time
+from tools.instrumentation import record_span
 
 class ReportingCrew:
     def run(self):
@@ -25,4 +27,8 @@ class ReportingCrew:
             verbose=True
         )
         result = crew.kickoff()
+        if agents.llm_cache is not None:
+            stats = agents.llm_cache.stats()
+            record_span('llm_cache', time.time(), 0.0, **stats)
+            print(f"🧠 LLM cache: {stats['hits']} hit(s), {stats['misses']} miss(es)")
         return result
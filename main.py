@@ -1,12 +1,78 @@
+import os
+import sys
+from datetime import date
 from dotenv import load_dotenv
-from crew import ReportingCrew
+from tools.instrumentation import recording_run
+
+def run_mode() -> str:
+    """'direct' runs the stages without agents; anything else uses the CrewAI crew."""
+    if '--direct' in sys.argv[1:]:
+        return 'direct'
+    return os.getenv("REPORT_MODE", "crew").strip().lower()
 
 def run():
     """Main function to run the crew, called by 'crewai run'."""
     load_dotenv()
     
+    if '--schedule' in sys.argv[1:]:
+        from scheduler import ReportScheduler, warm_job
+        mode = run_mode()
+        print(f"\n--- Starting the Report Scheduler ({mode} mode) ---\n")
+        ReportScheduler(warm_job(mode)).run_forever()
+        return
+    
+    if '--backfill' in sys.argv[1:]:
+        from backfill import BackfillRunner
+        from tools.stages import StageError
+        index = sys.argv.index('--backfill')
+        try:
+            start, end = (date.fromisoformat(value) for value in sys.argv[index + 1:index + 3])
+        except ValueError:
+            print("Usage: python run.py --backfill YYYY-MM-DD YYYY-MM-DD")
+            sys.exit(2)
+        print(f"\n--- Starting the Backfill Run ({start} to {end}) ---\n")
+        try:
+            with recording_run('backfill'):
+                results = BackfillRunner(start, end).run()
+        except StageError as e:
+            print(f"❌ Error: {e}")
+            sys.exit(1)
+        failed = [day for day, result in results.items() if isinstance(result, Exception)]
+        print(f"\n\n--- Finished: {len(results) - len(failed)} report(s) built, {len(failed)} failed ---")
+        if failed:
+            sys.exit(1)
+        return
+    
+    if '--all-tenants' in sys.argv[1:]:
+        from tenants import MultiTenantRunner
+        print("\n--- Starting the Multi-Tenant Report Run ---\n")
+        with recording_run('all-tenants'):
+            results = MultiTenantRunner().run()
+        failed = [name for name, result in results.items() if isinstance(result, Exception)]
+        print(f"\n\n--- Finished: {len(results) - len(failed)} succeeded, {len(failed)} failed ---")
+        if failed:
+            sys.exit(1)
+        return
+    
+    if run_mode() == 'direct':
+        # Imported here so the direct mode never loads crewai or langchain_openai
+        from pipeline import DirectReportPipeline
+        from tools.stages import StageError
+        print("\n--- Starting the Direct Reporting Pipeline ---\n")
+        try:
+            with recording_run('direct'):
+                result = DirectReportPipeline().run()
+        except StageError as e:
+            print(f"❌ Error: {e}")
+            sys.exit(1)
+        print("\n\n--- Pipeline Execution Finished ---")
+        print(f"Report: {result['report_path']}")
+        return
+    
+    from crew import ReportingCrew
     print("\n--- Starting the Fully Automated Reporting Crew ---\n")
-    crew_result = ReportingCrew().run()
+    with recording_run('crew'):
+        crew_result = ReportingCrew().run()
     
     print("\n\n--- Crew Execution Finished ---")
     print("Final Result:")
@@ -0,0 +1,63 @@
+"""
+Direct pipeline runner: executes download -> analysis -> email -> cleanup in
+order without the CrewAI agents or any LLM calls.
+
+Progress is checkpointed in the report date's run manifest, so re-running
+after a failure resumes at the first stage that did not finish.
+"""
+
+from tools.instrumentation import span
+from tools.run_manifest import RunManifest
+from tools.stages import analyze_report, cleanup_files, download_and_analyze, download_report, overlap_enabled, report_day, send_report_email
+
+
+class DirectReportPipeline:
+    def __init__(self, client=None, mailer=None):
+        # The scheduler passes long-lived clients so connections and token state stay warm between runs
+        self.client = client
+        self.mailer = mailer
+
+    def run(self) -> dict:
+        manifest = RunManifest(report_day().date())
+        if manifest.done('cleanup'):
+            print(f"⏭️ The report for {manifest.report_date} already ran to completion ({manifest.path}); use --force to run it again")
+            return {
+                'data_path': manifest.stage('download')['outputs']['data_path'],
+                'report_path': manifest.stage('analysis')['outputs']['report_path'],
+                'recipient': manifest.stage('email')['outputs']['recipient'],
+                'deleted_files': [],
+            }
+
+        if overlap_enabled():
+            print("📥📊 Stages 1-2/4: download with analysis overlapped")
+            with span('stage.download_analysis'):
+                data_path, report_path = download_and_analyze(self.client, manifest=manifest)
+            print(f"✅ Downloaded: {data_path}")
+            print(f"✅ Report created: {report_path}")
+        else:
+            print("📥 Stage 1/4: download")
+            with span('stage.download'):
+                data_path = download_report(self.client, manifest=manifest)
+            print(f"✅ Downloaded: {data_path}")
+
+            print("📊 Stage 2/4: analysis")
+            with span('stage.analysis'):
+                report_path = analyze_report(data_path, manifest=manifest)
+            print(f"✅ Report created: {report_path}")
+
+        print("📧 Stage 3/4: email")
+        with span('stage.email'):
+            recipient, filename = send_report_email(report_path, mailer=self.mailer, manifest=manifest)
+        print(f"✅ Email sent to {recipient} with report: {filename}")
+
+        print("🧹 Stage 4/4: cleanup")
+        with span('stage.cleanup'):
+            deleted_files = cleanup_files(manifest)
+        print(f"✅ Deleted {len(deleted_files)} file(s)")
+
+        return {
+            'data_path': data_path,
+            'report_path': report_path,
+            'recipient': recipient,
+            'deleted_files': deleted_files,
+        }
@@ -9,6 +9,7 @@ import requests
 import json
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from tools.uniware_client import UniwareClient
 
 def main():
     print("🎥 RECORDING API ERROR FOR SUPPORT TEAM")
@@ -26,26 +27,16 @@ def main():
     
     # Step 1: Get Access Token
     print("\n📡 Making authentication request...")
-    tenant = 'priyankdesigns'
-    auth_url = f"https://{tenant}.unicommerce.com/oauth/token"
-    auth_params = {
-        'grant_type': 'password',
-        'client_id': 'my-trusted-client',
-        'username': username,
-        'password': password
-    }
+    client = UniwareClient(username=username, password=password)
+    print(f"Tenant: {client.tenant} / Facility: {client.facility}")
     
     try:
-        auth_response = requests.get(auth_url, params=auth_params)
-        print(f"✅ Authentication Status: {auth_response.status_code}")
-        
-        if auth_response.status_code == 200:
-            token = auth_response.json()['access_token']
-            print(f"✅ Token received: {token[:20]}...")
-        else:
-            print(f"❌ Authentication failed: {auth_response.text}")
-            return
-            
+        # Shares the on-disk token cache with the crew's Uniware tool
+        token = client.authenticate()
+        print(f"✅ Token received: {token[:20]}...")
+    except requests.HTTPError as e:
+        print(f"❌ Authentication failed: {e.response.status_code} {e.response.text}")
+        return
     except Exception as e:
         print(f"❌ Authentication error: {str(e)}")
         return
@@ -54,12 +45,8 @@ def main():
     print("\n📋 Step 2: Creating Export Job")
     print("📡 Making export job request...")
     
-    export_url = f"https://{tenant}.unicommerce.com/services/rest/v1/export/job/create"
-    headers = {
-        'Content-Type': 'application/json',
-        'Authorization': f'bearer {token}',
-        'facility': 'priyankdesigns'
-    }
+    export_url = f"{client.base_url}/services/rest/v1/export/job/create"
+    headers = {**client.api_headers, 'Authorization': f'bearer {token}'}
     
     # Calculate date range
     yesterday = datetime.now() - timedelta(days=1)
@@ -89,7 +76,8 @@ def main():
     print(f"📤 Payload: {json.dumps(payload, indent=2)}")
     
     try:
-        export_response = requests.post(export_url, headers=headers, data=json.dumps(payload))
+        # Raw session call (no retries) so the failing response is shown as-is
+        export_response = client.session.post(export_url, headers=headers, data=json.dumps(payload), timeout=client.timeout)
         print(f"\n📊 RESPONSE DETAILS:")
         print(f"Status Code: {export_response.status_code}")
         print(f"Response Headers: {dict(export_response.headers)}")
@@ -0,0 +1,191 @@
+"""
+Resident scheduler: keeps the report modules and HTTP/SMTP clients loaded and
+fires the report on a cron-style schedule.
+
+Each firing waits a random jitter (``SCHEDULE_JITTER`` seconds) after the slot.
+The last slot handled is kept in ``SCHEDULE_STATE``; if the process was down
+or the machine asleep when a slot passed, the most recent missed slot is run
+once on start-up or wake-up, provided it is no older than
+``SCHEDULE_CATCH_UP_HOURS``.
+"""
+
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from tools.fileio import write_json
+from tools.instrumentation import recording_run
+
+# How far back/forward to look for a matching day before giving up on an expression
+SEARCH_DAYS = 366 * 5
+
+
+class CronSchedule:
+    """Standard five-field cron expression: minute hour day-of-month month day-of-week.
+
+    Fields accept ``*``, numbers, ``a-b`` ranges, ``,`` lists and ``/step``;
+    day-of-week is 0-7 with 0 and 7 both Sunday. As in cron, when both day
+    fields are restricted a day matching either one fires.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got {len(fields)}: '{expression}'")
+        self.expression = expression
+        self.minutes = self._parse(fields[0], 0, 59)
+        self.hours = self._parse(fields[1], 0, 23)
+        self.days = self._parse(fields[2], 1, 31)
+        self.months = self._parse(fields[3], 1, 12)
+        self.weekdays = {day % 7 for day in self._parse(fields[4], 0, 7)}
+        self._any_day = fields[2] == '*'
+        self._any_weekday = fields[4] == '*'
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> set:
+        values = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step_text = part.split('/', 1)
+                step = int(step_text)
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = (int(value) for value in part.split('-', 1))
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Invalid cron field '{field}' (allowed {low}-{high})")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, day: datetime) -> bool:
+        if day.month not in self.months:
+            return False
+        in_days = day.day in self.days
+        in_weekdays = (day.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def _slots(self, day: datetime) -> list:
+        if not self._day_matches(day):
+            return []
+        midnight = day.replace(hour=0, minute=0, second=0, microsecond=0)
+        return [midnight.replace(hour=hour, minute=minute) for hour in sorted(self.hours) for minute in sorted(self.minutes)]
+
+    def next_after(self, moment: datetime) -> datetime:
+        for offset in range(SEARCH_DAYS):
+            for slot in self._slots(moment + timedelta(days=offset)):
+                if slot > moment:
+                    return slot
+        raise ValueError(f"Cron expression '{self.expression}' never fires")
+
+    def last_before(self, moment: datetime) -> datetime:
+        """The latest slot at or before ``moment``, or None."""
+        for offset in range(SEARCH_DAYS):
+            slots = [slot for slot in self._slots(moment - timedelta(days=offset)) if slot <= moment]
+            if slots:
+                return slots[-1]
+        return None
+
+
+class ReportScheduler:
+    def __init__(self, job, schedule: str = None, jitter: float = None, state_path: str = None,
+                 catch_up_hours: float = None):
+        self.job = job
+        self.schedule = CronSchedule(schedule or os.getenv("REPORT_SCHEDULE", "30 7 * * *"))
+        self.jitter = jitter if jitter is not None else float(os.getenv("SCHEDULE_JITTER", "300"))
+        self.state_path = state_path or os.getenv("SCHEDULE_STATE", "scheduler_state.json")
+        if catch_up_hours is None:
+            catch_up_hours = float(os.getenv("SCHEDULE_CATCH_UP_HOURS", "12"))
+        self.catch_up = timedelta(hours=catch_up_hours)
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state: dict) -> None:
+        write_json(self.state_path, state, indent=2)
+
+    def missed_slot(self, now: datetime) -> datetime:
+        """The most recent slot that passed without being handled, if still worth running."""
+        last_slot = self._load_state().get('last_slot')
+        if not last_slot:
+            # A first start has nothing to catch up on; it waits for the next slot
+            return None
+        slot = self.schedule.last_before(now)
+        if slot is None or now - slot > self.catch_up or datetime.fromisoformat(last_slot) >= slot:
+            return None
+        return slot
+
+    def fire(self, slot: datetime) -> None:
+        print(f"⏰ Running report for slot {slot:%Y-%m-%d %H:%M}")
+        state = {'last_slot': slot.isoformat(), 'started_at': datetime.now().isoformat(timespec='seconds')}
+        try:
+            self.job()
+            state['status'] = 'success'
+        except Exception as e:
+            # The slot still counts as handled so a failing job is not retried in a tight loop
+            state.update(status='failed', error=f"{type(e).__name__}: {e}")
+            print(f"❌ Scheduled run failed: {e}")
+        state['finished_at'] = datetime.now().isoformat(timespec='seconds')
+        self._save_state(state)
+
+    def _sleep_until(self, wake_at: float) -> None:
+        # Short naps so a suspend or clock change is noticed soon after wake-up
+        while True:
+            remaining = wake_at - time.time()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, 60))
+
+    def run_forever(self) -> None:
+        print(f"🗓️ Scheduler started: '{self.schedule.expression}', jitter up to {self.jitter:.0f}s")
+        while True:
+            now = datetime.now()
+            slot = self.missed_slot(now)
+            if slot is not None:
+                print(f"↩️ Catching up missed slot {slot:%Y-%m-%d %H:%M}")
+                self.fire(slot)
+                continue
+            slot = self.schedule.next_after(now)
+            wake_at = slot.timestamp() + random.uniform(0, self.jitter)
+            print(f"💤 Next run at {datetime.fromtimestamp(wake_at):%Y-%m-%d %H:%M:%S}")
+            self._sleep_until(wake_at)
+            if datetime.now() - slot > self.catch_up:
+                # Slept through the slot (e.g. suspended overnight); the loop decides what is still due
+                continue
+            self.fire(slot)
+
+
+def warm_job(mode: str):
+    """Import everything the run needs now and return a job that reuses long-lived clients."""
+    if mode == 'direct':
+        from pipeline import DirectReportPipeline
+        # Loaded now so the first scheduled run does not pay for pandas/openpyxl/pyarrow
+        from tools import analysis, columnar_cache, report_writer, rollup_store
+        from tools.mailer import MailDispatcher, smtp_credentials
+        from tools.uniware_client import UniwareClient
+
+        client = UniwareClient()
+        mailer = MailDispatcher(*smtp_credentials())
+
+        def job():
+            with recording_run('scheduled-direct'):
+                DirectReportPipeline(client=client, mailer=mailer).run()
+        return job
+
+    from crew import ReportingCrew
+
+    def job():
+        with recording_run('scheduled-crew'):
+            ReportingCrew().run()
+    return job
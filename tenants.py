@@ -0,0 +1,76 @@
+"""
+Multi-tenant runner: downloads and analyses the report for every tenant in
+config/tenants.yaml concurrently, each with its own credentials and output
+directory. A tenant whose credential variables are unset fails on its own;
+it never borrows the default tenant's UNIWARE_* settings.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import yaml
+
+from tools.instrumentation import span, submit
+from tools.stages import StageError, analyze_report, download_report
+from tools.uniware_client import UniwareClient
+
+
+class TenantRegistry:
+    def __init__(self, path: str = 'config/tenants.yaml'):
+        with open(path, 'r') as file:
+            self.tenants_config = yaml.safe_load(file) or {}
+
+    def names(self) -> list:
+        return list(self.tenants_config)
+
+    def client(self, name: str) -> UniwareClient:
+        """A client built only from the tenant's own settings, never the default tenant's environment."""
+        config = self.tenants_config[name]
+        credentials = {}
+        for key in ('username_env', 'password_env'):
+            variable = config.get(key)
+            if not variable:
+                raise StageError(f"Tenant '{name}' in config/tenants.yaml has no '{key}'.")
+            credentials[key] = os.getenv(variable, '').strip()
+            if not credentials[key]:
+                raise StageError(f"Tenant '{name}': environment variable {variable} is not set.")
+        tenant = config.get('tenant', name)
+        return UniwareClient(
+            tenant=tenant,
+            facility=config.get('facility', tenant),
+            username=credentials['username_env'],
+            password=credentials['password_env'],
+            base_url=config.get('base_url', f"https://{tenant}.unicommerce.com"),
+        )
+
+    def output_dir(self, name: str) -> str:
+        return self.tenants_config[name].get('output_dir', os.path.join('reports', name))
+
+
+class MultiTenantRunner:
+    def __init__(self, registry: TenantRegistry = None, max_workers: int = None):
+        self.registry = registry or TenantRegistry()
+        self.max_workers = max_workers or int(os.getenv("TENANT_WORKERS", "4"))
+
+    def _run_tenant(self, name: str) -> str:
+        output_dir = self.registry.output_dir(name)
+        with span('tenant', tenant=name):
+            client = self.registry.client(name)
+            data_path = download_report(client, output_dir=output_dir)
+            return analyze_report(data_path, output_dir=output_dir, tenant=client.tenant)
+
+    def run(self) -> dict:
+        """Returns ``{tenant: report path or exception}``; one tenant failing never stops the others."""
+        results = {}
+        names = self.registry.names()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(names)) or 1) as pool:
+            futures = {submit(pool, self._run_tenant, name): name for name in names}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                    print(f"✅ [{name}] Report created: {results[name]}")
+                except Exception as e:
+                    results[name] = e
+                    print(f"❌ [{name}] {e}")
+        return results
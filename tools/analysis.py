@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+from tools.exclusions import exclusion_rules
+
+# Columns the channel summary reads from a Uniware "Sale Orders" export
+REPORT_COLUMNS = ['Created', 'Channel Name', 'Sale Order Status', 'Sale Order Code', 'Total Price']
+# Uniware export column id requested for each of REPORT_COLUMNS
+EXPORT_COLUMN_IDS = {
+    'Created': 'created',
+    'Channel Name': 'channel',
+    'Sale Order Status': 'status',
+    'Sale Order Code': 'saleOrderCode',
+    'Total Price': 'totalPrice',
+}
+
+
+def exclusion_mask(df: pd.DataFrame) -> np.ndarray:
+    """One boolean mask of every row the report must not count (see config/exclusions.yaml)."""
+    return exclusion_rules().compile(df.columns).mask(df)
+
+
+def report_columns(columns) -> list:
+    """The export columns the report reads, including whichever columns the exclusion rules use."""
+    base = [c for c in REPORT_COLUMNS if c in columns]
+    return base + [c for c in exclusion_rules().compile(columns).columns if c not in base]
+
+
+def export_request(server_filters: bool = True) -> tuple:
+    """Uniware export column ids and extra ``exportFilters`` for what the report and rules read."""
+    rules = exclusion_rules()
+    columns = list(dict.fromkeys(list(EXPORT_COLUMN_IDS.values()) + rules.export_columns()))
+    return columns, rules.export_filters() if server_filters else []
+
+
+def check_export_header(columns) -> list:
+    """Report headers missing from an export; warns about rules whose requested column did not resolve."""
+    for rule in exclusion_rules().unresolved(columns):
+        print(f"⚠️ Exclusion rule '{rule.name}' requested export column '{rule.export_column}' but no header matches it; the rule is skipped")
+    return [c for c in REPORT_COLUMNS if c not in columns]
+
+
+def parse_created(created: pd.Series) -> pd.Series:
+    """Order timestamps as naive datetimes, unparseable values as NaT."""
+    dates = pd.to_datetime(created, errors='coerce')
+    if getattr(dates.dt, 'tz', None) is not None:
+        # Keep the wall-clock date, as .dt.date would
+        dates = dates.dt.tz_localize(None)
+    return dates
+
+
+def day_numbers(created: pd.Series) -> np.ndarray:
+    """Days since the epoch for each order, with NaT left as the datetime64 sentinel."""
+    return parse_created(created).to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+
+
+def period_masks(df: pd.DataFrame, previous_day, start_of_month) -> tuple:
+    """Day number per row plus masks of the counted rows in the daily and MTD periods."""
+    days = day_numbers(df['Created'])
+    valid = ~np.isnat(days) & ~exclusion_mask(df)
+    prev = np.datetime64(previous_day.date(), 'D')
+    start = np.datetime64(start_of_month.date(), 'D')
+    return days, valid & (days == prev), valid & (days >= start) & (days <= prev)
+
+
+def order_weights(df: pd.DataFrame) -> tuple:
+    """Per-row Qty (1 when the row has an order code) and Amt, as float arrays for bincount."""
+    has_code = df['Sale Order Code'].notna().to_numpy(dtype=np.float64)
+    price = np.nan_to_num(pd.to_numeric(df['Total Price'], errors='coerce').to_numpy(dtype=np.float64))
+    return has_code, price
+
+
+def channel_codes(channels: pd.Series) -> tuple:
+    """Integer channel code per row plus the stripped channel names they index.
+
+    Names are stripped once per distinct value rather than once per row;
+    missing names become 'nan', as ``astype(str)`` always produced.
+    """
+    codes, uniques = pd.factorize(channels, use_na_sentinel=False)
+    stripped = pd.Index(uniques).astype(str).str.strip()
+    merged_codes, names = pd.factorize(stripped)
+    return merged_codes[codes], pd.Index(names)
+
+
+TOTAL_COLUMNS = ['daily_rows', 'daily_qty', 'daily_amt', 'mtd_rows', 'mtd_qty', 'mtd_amt']
+DAILY_COLUMNS = ['Date', 'Channel Name', 'Qty', 'Amt']
+
+
+def channel_totals(df: pd.DataFrame, previous_day, start_of_month) -> pd.DataFrame:
+    """Per-channel daily and MTD row counts, Qty and Amt (a slice of the run's ``SalesCube``)."""
+    from tools.sales_cube import SalesCube
+
+    return SalesCube.from_frame(df, previous_day, start_of_month).channel_totals()
+
+
+def report_chunks(source, chunk_rows: int, columns: list = None):
+    """Iterate an export CSV in chunks of the report columns, statuses as categoricals.
+
+    ``source`` is a path or a binary file object; pass the header as ``columns``
+    when it cannot be read twice.
+    """
+    if columns is None:
+        columns = pd.read_csv(source, nrows=0).columns
+    usecols = report_columns(columns)
+    dtype = {col: 'category' for col in usecols if col not in ('Created', 'Total Price', 'Sale Order Code')}
+    dtype['Total Price'] = 'float64'
+    return pd.read_csv(source, usecols=usecols, dtype=dtype, chunksize=chunk_rows)
+
+
+def mtd_orders(df: pd.DataFrame, previous_day, start_of_month) -> pd.DataFrame:
+    """The MTD rows the report counts, trimmed to the report columns."""
+    _, _, in_mtd = period_masks(df, previous_day, start_of_month)
+    orders = df.loc[in_mtd, report_columns(df.columns)]
+    return orders.assign(Created=parse_created(orders['Created']))
+
+
+def build_report(totals: pd.DataFrame, previous_day, comparisons: pd.DataFrame = None) -> pd.DataFrame:
+    """Channel summary with a Grand Total row, laid out as the Excel report expects.
+
+    ``comparisons`` adds extra per-channel columns (e.g. from the rollup store)
+    after the MTD columns; channels that only appear there are listed too.
+    """
+    keep = (totals['daily_rows'] > 0) | (totals['mtd_rows'] > 0)
+    if comparisons is not None:
+        channels = totals.index[keep].union(comparisons.index[(comparisons != 0).any(axis=1)])
+        present = totals.reindex(channels, fill_value=0).sort_index()
+    else:
+        present = totals[keep].sort_index()
+    day_label = previous_day.strftime("%d-%m-%Y")
+    final_report = pd.DataFrame({
+        'Channel Name': present.index.astype(object),
+        f'Qty_{day_label}': present['daily_qty'].to_numpy(),
+        f'Amt_{day_label}': present['daily_amt'].to_numpy(),
+        'Qty_MTD': present['mtd_qty'].to_numpy(),
+        'Amt_MTD': present['mtd_amt'].to_numpy(),
+    })
+    if comparisons is not None:
+        extra = comparisons.reindex(present.index, fill_value=0)
+        for col in comparisons.columns:
+            final_report[col] = extra[col].to_numpy()
+
+    # Append a Grand Total row across all numeric columns
+    totals_row = {col: final_report[col].sum() for col in final_report.columns if col != 'Channel Name'}
+    totals_row['Channel Name'] = 'Grand Total'
+    return pd.concat([final_report, pd.DataFrame([totals_row])], ignore_index=True)
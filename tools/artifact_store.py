@@ -0,0 +1,136 @@
+"""
+Indexed store for the files a run produces.
+
+Exports and reports are written under ``ARTIFACT_DIR`` (default
+``artifacts/``) as ``<tenant>/<report date>/<file>`` and recorded in a SQLite
+index with their run id, tenant, report date, size and SHA-256, so "the
+export for this date" is an indexed lookup instead of globbing and stat-ing
+the working directory. After the email is sent the run's exports are
+gzip-compressed in place; artifacts older than ``ARTIFACT_RETENTION_DAYS`` or
+beyond ``ARTIFACT_MAX_MB`` in total (oldest first) are evicted.
+"""
+
+import gzip
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import date
+
+from tools.fileio import atomic_path
+from tools.instrumentation import current_run_id
+from tools.run_manifest import file_digest
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    tenant TEXT,
+    report_date TEXT NOT NULL,
+    run_id TEXT,
+    sha256 TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    archived INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS artifacts_lookup ON artifacts (kind, report_date, tenant, created_at);
+CREATE INDEX IF NOT EXISTS artifacts_age ON artifacts (created_at);
+"""
+
+
+class ArtifactStore:
+    def __init__(self, root: str = None, retention_days: float = None, max_mb: float = None):
+        self.root = os.path.normpath(root or os.getenv("ARTIFACT_DIR", "artifacts"))
+        self.index_path = os.path.join(self.root, "index.sqlite")
+        self.retention_days = retention_days if retention_days is not None else float(os.getenv("ARTIFACT_RETENTION_DAYS", "30"))
+        self.max_bytes = 1024 * 1024 * (max_mb if max_mb is not None else float(os.getenv("ARTIFACT_MAX_MB", "500")))
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(self.root, exist_ok=True)
+        connection = sqlite3.connect(self.index_path, timeout=30)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def path_for(self, report_date: date, filename: str, tenant: str = None) -> str:
+        directory = os.path.join(self.root, *([tenant] if tenant else []), f"{report_date:%Y-%m-%d}")
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, filename)
+
+    def register(self, kind: str, path: str, report_date: date, tenant: str = None) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO artifacts (path, kind, tenant, report_date, run_id, sha256, bytes, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, kind, tenant, f"{report_date:%Y-%m-%d}", current_run_id(), file_digest(path),
+                 os.path.getsize(path), time.time()),
+            )
+
+    def latest(self, kind: str, report_date: date, tenant: str = None) -> str:
+        """Newest un-archived artifact of ``kind`` for the date (and tenant, when given), or None."""
+        query = "SELECT path FROM artifacts WHERE kind = ? AND report_date = ? AND archived = 0"
+        params = [kind, f"{report_date:%Y-%m-%d}"]
+        if tenant:
+            query += " AND tenant = ?"
+            params.append(tenant)
+        with closing(self._connect()) as connection:
+            row = connection.execute(query + " ORDER BY created_at DESC LIMIT 1", params).fetchone()
+        return row[0] if row and os.path.exists(row[0]) else None
+
+    def tenant_of(self, path: str) -> str:
+        with closing(self._connect()) as connection:
+            row = connection.execute("SELECT tenant FROM artifacts WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def archive(self, report_date: date) -> list:
+        """Gzip the date's exports in place; returns the archive paths."""
+        archived = []
+        with self._lock, closing(self._connect()) as connection, connection:
+            rows = connection.execute(
+                "SELECT path FROM artifacts WHERE kind = 'export' AND report_date = ? AND archived = 0",
+                (f"{report_date:%Y-%m-%d}",),
+            ).fetchall()
+            for (path,) in rows:
+                if not os.path.exists(path):
+                    connection.execute("DELETE FROM artifacts WHERE path = ?", (path,))
+                    continue
+                target = path + '.gz'
+                with atomic_path(target) as tmp_path:
+                    with open(path, 'rb') as source, gzip.open(tmp_path, 'wb') as compressed:
+                        shutil.copyfileobj(source, compressed, 1024 * 1024)
+                os.remove(path)
+                # sha256 stays that of the uncompressed export
+                connection.execute("UPDATE artifacts SET path = ?, bytes = ?, archived = 1 WHERE path = ?",
+                                   (target, os.path.getsize(target), path))
+                archived.append(target)
+        return archived
+
+    def enforce_retention(self, keep_report_date: date = None) -> list:
+        """Evict artifacts past the age limit, then the oldest until under the size limit.
+
+        Artifacts of ``keep_report_date`` (the run in progress) are never evicted.
+        Returns the deleted paths.
+        """
+        keep = f"{keep_report_date:%Y-%m-%d}" if keep_report_date else None
+        cutoff = time.time() - self.retention_days * 86400
+        deleted = []
+        with self._lock, closing(self._connect()) as connection, connection:
+            rows = connection.execute("SELECT path, report_date, bytes, created_at FROM artifacts ORDER BY created_at").fetchall()
+            total = sum(row[2] for row in rows)
+            for path, report_date, size, created_at in rows:
+                if report_date == keep or (created_at >= cutoff and total <= self.max_bytes):
+                    continue
+                if os.path.exists(path):
+                    os.remove(path)
+                    deleted.append(path)
+                connection.execute("DELETE FROM artifacts WHERE path = ?", (path,))
+                total -= size
+        for path in deleted:
+            # Drop the date (and tenant) directories once they are empty
+            directory = os.path.dirname(path)
+            while directory != self.root and os.path.isdir(directory) and not os.listdir(directory):
+                os.rmdir(directory)
+                directory = os.path.dirname(directory)
+        return deleted
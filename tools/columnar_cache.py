@@ -0,0 +1,118 @@
+import os
+
+import pandas as pd
+
+from tools.analysis import report_columns
+from tools.fileio import atomic_path
+from tools.run_manifest import file_digest
+from tools.settings import env_flag
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency; the analysis falls back to parsing the CSV
+    pa = None
+    pq = None
+
+# Bump whenever the normalization below changes so old cache files are ignored
+CACHE_VERSION = 2
+ROW_GROUP_ROWS = 250_000
+
+
+def columnar_cache_enabled() -> bool:
+    # Opt-in: a daily export is new every run, so the cache only pays off when the same file is analysed again
+    return pq is not None and env_flag("ANALYSIS_CACHE")
+
+
+class ColumnarCache:
+    """Typed Parquet copies of Uniware CSV exports, keyed on the CSV's content hash.
+
+    A CSV is parsed and normalized once (dates parsed, channel names stripped;
+    status values are kept as exported because the exclusion rules normalize
+    them per distinct value); later reads memory-map the Parquet file and only
+    load the requested columns and the row groups that can match the filters.
+
+    Every month-to-date export is a new file, so only the ``max_files`` most
+    recently used copies (``ANALYSIS_CACHE_MAX_FILES``) are kept. Runs with
+    their own output directory (tenants, backfill) get their own cache, so one
+    tenant's eviction never removes a file another is about to read.
+    """
+
+    def __init__(self, directory: str = None, max_files: int = None):
+        self.directory = directory or os.getenv("ANALYSIS_CACHE_DIR", ".analysis_cache")
+        self.max_files = max_files or int(os.getenv("ANALYSIS_CACHE_MAX_FILES", "3"))
+
+    @classmethod
+    def for_output_dir(cls, output_dir: str = None, max_files: int = None) -> 'ColumnarCache':
+        return cls(os.path.join(output_dir, ".analysis_cache") if output_dir else None, max_files)
+
+    def path_for(self, source: str, digest: str = None) -> str:
+        digest = digest or file_digest(source)
+        return os.path.join(self.directory, f"{digest}.v{CACHE_VERSION}.parquet")
+
+    def _build(self, source: str, target: str, columns: list) -> None:
+        schema = pa.schema([
+            (col, pa.timestamp('ns') if col == 'Created' else pa.float64() if col == 'Total Price' else pa.string())
+            for col in columns
+        ])
+
+        os.makedirs(self.directory, exist_ok=True)
+        dtype = {col: str for col in columns if col not in ('Created', 'Total Price')}
+        with atomic_path(target) as tmp_path, pq.ParquetWriter(tmp_path, schema) as writer:
+            for chunk in pd.read_csv(source, usecols=columns, dtype=dtype, chunksize=ROW_GROUP_ROWS):
+                writer.write_table(pa.Table.from_pandas(normalize_orders(chunk), schema=schema, preserve_index=False))
+
+    def ensure(self, source: str) -> str:
+        """Build the Parquet copy of ``source`` if it is missing or stale; returns its path."""
+        target = self.path_for(source)
+        needed = report_columns(pd.read_csv(source, nrows=0).columns)
+        # An exclusion rule added since the cache was built may need a column it lacks
+        if not os.path.exists(target) or not set(needed) <= set(pq.read_schema(target).names):
+            print(f"🧱 Building columnar cache for {source}")
+            self._build(source, target, needed)
+            self.evict(keep=target)
+        else:
+            # The modification time doubles as the last use for eviction
+            os.utime(target)
+        return target
+
+    def evict(self, keep: str = None) -> list:
+        """Delete all but the ``max_files`` most recently used cache files; returns the deleted paths."""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith('.parquet') and path != keep:
+                entries.append((os.path.getmtime(path), path))
+        deleted = []
+        for _, path in sorted(entries, reverse=True)[max(self.max_files - 1, 0):]:
+            try:
+                os.remove(path)
+                deleted.append(path)
+            except OSError:
+                # Still memory-mapped by another process (Windows); evicted next time
+                pass
+        return deleted
+
+    def load(self, source: str, columns: list = None, filters: list = None) -> pd.DataFrame:
+        target = self.ensure(source)
+        available = pq.read_schema(target).names
+        columns = [c for c in (columns or available) if c in available]
+        string_columns = [c for c in columns if c not in ('Created', 'Total Price', 'Sale Order Code')]
+        table = pq.read_table(target, columns=columns, filters=filters, memory_map=True, read_dictionary=string_columns)
+        return table.to_pandas()
+
+
+def normalize_orders(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalize an export chunk the same way ``channel_totals`` would see it."""
+    out = pd.DataFrame(index=df.index)
+    for col in df.columns:
+        if col == 'Created':
+            out[col] = pd.to_datetime(df[col], errors='coerce')
+        elif col == 'Total Price':
+            out[col] = pd.to_numeric(df[col], errors='coerce')
+        elif col == 'Channel Name':
+            # astype(str) keeps the existing 'nan' channel for missing names
+            out[col] = df[col].astype(str).str.strip()
+        else:
+            out[col] = df[col]
+    return out
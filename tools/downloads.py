@@ -0,0 +1,174 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import time
+
+import requests
+from urllib3.exceptions import HTTPError as TransportError
+
+from tools.fileio import atomic_path
+
+CHUNK_SIZE = 1024 * 1024
+# Transient statuses worth another attempt (the API client retries the same ones)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class DownloadError(Exception):
+    pass
+
+
+def _expected_md5(response) -> str:
+    # S3-style single-part ETags and Content-MD5 both carry the MD5 of the stored bytes
+    content_md5 = response.headers.get('Content-MD5')
+    if content_md5:
+        try:
+            return base64.b64decode(content_md5).hex()
+        except ValueError:
+            return None
+    etag = response.headers.get('ETag', '').strip('"')
+    if re.fullmatch(r'[0-9a-fA-F]{32}', etag):
+        return etag.lower()
+    return None
+
+
+def _expected_size(response, offset: int) -> int:
+    content_range = response.headers.get('Content-Range', '')
+    match = re.search(r'/(\d+)$', content_range)
+    if match:
+        return int(match.group(1))
+    length = response.headers.get('Content-Length')
+    return offset + int(length) if length else None
+
+
+def _validator(response) -> str:
+    """ETag, else Last-Modified: what ``If-Range`` needs to prove a resumed range is the same object."""
+    return response.headers.get('ETag') or response.headers.get('Last-Modified')
+
+
+def _retry_delay(response, attempt: int) -> float:
+    retry_after = response.headers.get('Retry-After')
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return min(2 ** attempt, 30) * random.uniform(0.5, 1.0)
+
+
+def _load_meta(meta_path: str) -> dict:
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def download_file(url: str, dest: str, session=None, max_attempts: int = 5, timeout=(10, 60), sink=None) -> str:
+    """Stream ``url`` to ``dest`` in fixed-size chunks.
+
+    Bytes land in ``dest + '.part'`` exactly as sent on the wire, so an
+    interrupted transfer is resumed with a Range request (within this call or
+    on the next run) when the server advertises byte ranges and the partial
+    file came from the same URL with an ETag or Last-Modified validator, sent as
+    ``If-Range``; anything else starts over. 429 and 5xx answers are retried
+    with backoff like the API client's. Once the size and,
+    where the server exposes one, the MD5 checksum match, the file is
+    decompressed if it was gzip-encoded and atomically renamed into place.
+
+    A ``sink`` (``tools.streaming.ByteStream``) is fed every chunk as it
+    arrives, so a reader can parse the export while it downloads.
+    """
+    http = session or requests
+    part_path = dest + '.part'
+    meta_path = part_path + '.json'
+    last_error = None
+
+    for attempt in range(1, max_attempts + 1):
+        meta = _load_meta(meta_path)
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) and meta else 0
+        headers = {'Accept-Encoding': 'gzip'}
+        # A prefix from another URL (e.g. a new export job) or one that cannot be validated is never resumed
+        if offset and meta.get('accept_ranges') and meta.get('url') == url and meta.get('validator'):
+            headers['Range'] = f'bytes={offset}-'
+            headers['If-Range'] = meta['validator']
+        else:
+            offset = 0
+
+        try:
+            with http.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                if response.status_code == 416:
+                    # Our partial file is no longer valid for this object; start over
+                    last_error = DownloadError("the server rejected the resumed range")
+                    if os.path.exists(part_path):
+                        os.remove(part_path)
+                    continue
+                if response.status_code in RETRY_STATUSES and attempt < max_attempts:
+                    last_error = DownloadError(f"HTTP {response.status_code}")
+                    delay = _retry_delay(response, attempt)
+                    print(f"⚠️ Download returned {response.status_code}, retrying in {delay:.1f}s...")
+                    time.sleep(delay)
+                    continue
+                response.raise_for_status()
+                if offset and response.status_code != 206:
+                    offset = 0
+                if not offset:
+                    meta = {
+                        'url': url,
+                        'validator': _validator(response),
+                        'encoding': response.headers.get('Content-Encoding', '').lower(),
+                        'accept_ranges': response.headers.get('Accept-Ranges', '').lower() == 'bytes',
+                        'size': _expected_size(response, 0),
+                        'md5': _expected_md5(response),
+                    }
+                    with open(meta_path, 'w', encoding='utf-8') as f:
+                        json.dump(meta, f)
+
+                if sink:
+                    sink.begin(meta.get('encoding'), offset, part_path)
+                with open(part_path, 'ab' if offset else 'wb') as f:
+                    # decode_content=False keeps the wire bytes so ranges and checksums line up
+                    for chunk in response.raw.stream(CHUNK_SIZE, decode_content=False):
+                        f.write(chunk)
+                        if sink:
+                            sink.feed(chunk)
+            break
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError, TransportError) as e:
+            last_error = e
+            print(f"⚠️ Download interrupted (attempt {attempt}/{max_attempts}): {e}")
+    else:
+        error = DownloadError(f"Download failed after {max_attempts} attempts: {last_error}")
+        if sink:
+            sink.fail(error)
+        raise error
+
+    if sink:
+        # The reader can finish its last chunk while the file is verified and renamed
+        sink.finish()
+    size = os.path.getsize(part_path)
+    if meta.get('size') is not None and size != meta['size']:
+        raise DownloadError(f"Downloaded size {size} does not match expected {meta['size']}")
+    if meta.get('md5'):
+        digest = hashlib.md5()
+        with open(part_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        if digest.hexdigest() != meta['md5']:
+            os.remove(part_path)
+            raise DownloadError("Checksum mismatch on downloaded report")
+
+    if meta.get('encoding') == 'gzip':
+        with atomic_path(dest) as tmp_path:
+            with gzip.open(part_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        os.remove(part_path)
+    else:
+        os.replace(part_path, dest)
+    os.remove(meta_path)
+    if sink:
+        sink.completed(dest)
+    return dest
@@ -0,0 +1,149 @@
+"""
+Declarative exclusion rules.
+
+Rules live in ``config/exclusions.yaml`` (or ``EXCLUSION_RULES``). For each
+CSV header they are compiled once into a map of resolved column -> excluded
+values; rules that resolve to the same column and normalization are merged,
+so applying them costs one lookup per distinct column however many rules
+there are. Values are normalized once per distinct value (via categorical or
+factorized codes), never once per row.
+
+A rule may also name the Uniware export column it needs (``export_column``),
+so the export only requests columns some rule reads, and an
+``export_filter`` passed to Uniware as-is so excluded rows are never
+exported.
+"""
+
+import functools
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from tools.run_manifest import file_digest
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'exclusions.yaml')
+DEFAULT_NORMALIZE = ('strip', 'lower')
+
+NORMALIZERS = {
+    'strip': lambda values: values.str.strip(),
+    'lower': lambda values: values.str.lower(),
+    'upper': lambda values: values.str.upper(),
+    'collapse_spaces': lambda values: values.str.replace(r'\s+', ' ', regex=True),
+}
+
+
+def normalize_values(values, steps) -> pd.Series:
+    normalized = pd.Series(values, dtype=object).astype(str)
+    for step in steps:
+        normalized = NORMALIZERS[step](normalized)
+    return normalized
+
+
+class ExclusionRule:
+    def __init__(self, name: str, exclude: list, column: str = None, contains: list = None,
+                 normalize: list = None, export_column: str = None, export_filter: dict = None):
+        if not column and not contains:
+            raise ValueError(f"Exclusion rule '{name}' needs a 'column' or 'contains' alias")
+        normalize = tuple(DEFAULT_NORMALIZE if normalize is None else normalize)
+        unknown = [step for step in normalize if step not in NORMALIZERS]
+        if unknown:
+            raise ValueError(f"Exclusion rule '{name}' has unknown normalize step(s): {', '.join(unknown)}")
+        self.name = name
+        self.column = column
+        self.contains = [[term.lower() for term in alias] for alias in (contains or [])]
+        self.normalize = normalize
+        self.exclude = frozenset(normalize_values(exclude or [], normalize))
+        self.export_column = export_column
+        self.export_filter = export_filter
+
+    def resolve(self, columns) -> str:
+        """The first header this rule applies to, or None."""
+        for col in columns:
+            if col == self.column:
+                return col
+            lowered = str(col).lower()
+            if any(all(term in lowered for term in alias) for alias in self.contains):
+                return col
+        return None
+
+
+class CompiledRules:
+    """Exclusion rules resolved against one CSV header."""
+
+    def __init__(self, rules: list, columns):
+        merged = {}
+        for rule in rules:
+            col = rule.resolve(columns)
+            if col is not None:
+                key = (col, rule.normalize)
+                merged[key] = merged.get(key, frozenset()) | rule.exclude
+        self.lookups = [(col, normalize, excluded) for (col, normalize), excluded in merged.items()]
+
+    @property
+    def columns(self) -> list:
+        return list(dict.fromkeys(col for col, _, _ in self.lookups))
+
+    def mask(self, df: pd.DataFrame) -> np.ndarray:
+        """One boolean mask of every row any rule excludes."""
+        mask = np.zeros(len(df), dtype=bool)
+        for col, normalize, excluded in self.lookups:
+            series = df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+            else:
+                codes, uniques = pd.factorize(series)
+            # The extra slot covers NaN (code -1), which compares as ''
+            lookup = np.append(normalize_values(uniques, normalize).isin(excluded).to_numpy(), '' in excluded)
+            mask |= lookup[codes]
+        return mask
+
+
+class ExclusionRules:
+    def __init__(self, rules: list):
+        self.rules = rules
+        self._compiled = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str) -> 'ExclusionRules':
+        with open(path, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+        return cls([ExclusionRule(name, **spec) for name, spec in config.items()])
+
+    def export_columns(self) -> list:
+        """Uniware export column ids the rules read."""
+        return list(dict.fromkeys(rule.export_column for rule in self.rules if rule.export_column))
+
+    def export_filters(self) -> list:
+        return [rule.export_filter for rule in self.rules if rule.export_filter]
+
+    def unresolved(self, columns) -> list:
+        """Rules that requested an export column but match no header in ``columns``."""
+        return [rule for rule in self.rules if rule.export_column and rule.resolve(columns) is None]
+
+    def compile(self, columns) -> CompiledRules:
+        """Rules resolved for this header; cached on the header's column names."""
+        fingerprint = tuple(columns)
+        compiled = self._compiled.get(fingerprint)
+        if compiled is None:
+            with self._lock:
+                compiled = self._compiled.setdefault(fingerprint, CompiledRules(self.rules, fingerprint))
+        return compiled
+
+
+@functools.lru_cache(maxsize=8)
+def _load_rules(path: str, digest: str) -> ExclusionRules:
+    return ExclusionRules.load(path)
+
+
+def rules_path() -> str:
+    return os.getenv("EXCLUSION_RULES", DEFAULT_RULES_PATH)
+
+
+def exclusion_rules() -> ExclusionRules:
+    """The current rules; keyed on the file's content, so an edit is picked up by a long-running process."""
+    path = rules_path()
+    return _load_rules(path, file_digest(path))
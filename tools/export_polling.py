@@ -0,0 +1,96 @@
+import json
+import os
+import random
+import statistics
+import time
+
+
+class ExportJobPoller:
+    """Polls an export job with a learned first probe and jittered exponential backoff.
+
+    Every probe of every run is appended to a JSONL history file. Completed
+    runs in that history give the expected job duration for a given export
+    date span, so the first status check can be scheduled just before the job
+    is likely to finish instead of at a fixed interval. Durations are learned
+    per day of span: a month-to-date export spans a different number of days
+    each run, so exact-span samples would almost never repeat.
+    """
+
+    def __init__(self, history_path: str = None, deadline: float = None, first_probe: float = None,
+                 max_interval: float = None, backoff: float = 2.0, sample_size: int = 20):
+        self.history_path = history_path or os.getenv("UNIWARE_POLL_HISTORY", "uniware_poll_history.jsonl")
+        self.deadline = deadline if deadline is not None else float(os.getenv("UNIWARE_POLL_DEADLINE", "900"))
+        self.first_probe = first_probe if first_probe is not None else float(os.getenv("UNIWARE_POLL_FIRST_PROBE", "2"))
+        self.max_interval = max_interval if max_interval is not None else float(os.getenv("UNIWARE_POLL_MAX_INTERVAL", "30"))
+        self.backoff = backoff
+        self.sample_size = sample_size
+
+    def _history(self) -> list:
+        if not os.path.exists(self.history_path):
+            return []
+        entries = []
+        with open(self.history_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+        return entries
+
+    def expected_duration(self, span_days: int) -> float:
+        completed = [entry for entry in self._history() if entry.get('outcome') == 'complete']
+        if not span_days:
+            durations = [entry['duration'] for entry in completed if not entry.get('span_days')][-self.sample_size:]
+            return statistics.median(durations) if durations else None
+        seconds_per_day = [
+            entry['duration'] / entry['span_days'] for entry in completed if entry.get('span_days')
+        ][-self.sample_size:]
+        return statistics.median(seconds_per_day) * span_days if seconds_per_day else None
+
+    def _record(self, entry: dict) -> None:
+        try:
+            with open(self.history_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print(f"⚠️ Could not record polling history: {e}")
+
+    def poll(self, check, span_days: int = None):
+        """Call ``check()`` until it returns a non-None result or the deadline passes.
+
+        ``check`` returns ``(status, result)``; ``result`` is None while the job
+        is still running.
+        """
+        expected = self.expected_duration(span_days)
+        # Land the first probe slightly before the learned completion time
+        delay = expected * 0.9 if expected else self.first_probe
+        interval = self.first_probe
+        started = time.monotonic()
+        probes = []
+        entry = {'started_at': time.time(), 'span_days': span_days, 'expected': expected, 'probes': probes}
+
+        while True:
+            elapsed = time.monotonic() - started
+            delay = min(delay, max(self.deadline - elapsed, 0))
+            time.sleep(delay)
+
+            try:
+                status, result = check()
+            except Exception as e:
+                entry.update(outcome='error', error=str(e), duration=round(time.monotonic() - started, 3))
+                self._record(entry)
+                raise
+            elapsed = time.monotonic() - started
+            probes.append({'elapsed': round(elapsed, 3), 'status': status})
+            if result is not None:
+                entry.update(outcome='complete', duration=round(elapsed, 3))
+                self._record(entry)
+                return result
+            if elapsed >= self.deadline:
+                entry.update(outcome='timeout', duration=round(elapsed, 3))
+                self._record(entry)
+                raise TimeoutError(f"Report generation timed out after {elapsed:.0f}s and {len(probes)} status checks.")
+
+            # Full jitter keeps concurrent pollers from synchronizing
+            delay = random.uniform(interval / 2, interval)
+            interval = min(interval * self.backoff, self.max_interval)
+            print(f"Report is still processing, next check in {delay:.1f} seconds...")
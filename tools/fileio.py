@@ -0,0 +1,33 @@
+"""
+Atomic file writes.
+
+Every store and report is written to a temporary file next to its target and
+moved into place with ``os.replace``, so a crash or a concurrent reader never
+sees a half-written file. The temporary name carries the process and thread
+id, so concurrent writers of the same target never share one.
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_path(path: str):
+    """Yield a temporary path to write; it replaces ``path`` only if the block completes."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_json(path: str, data, indent: int = None, mode: int = 0o666) -> None:
+    """Atomically write ``data`` as JSON; ``mode`` (before the umask) e.g. ``0o600`` for secrets."""
+    with atomic_path(path) as tmp_path:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent)
@@ -0,0 +1,177 @@
+"""
+Lightweight run instrumentation.
+
+Stages wrap their work in ``span(...)``; while a ``recording_run`` is active,
+each span's wall time, the process's RSS high-water mark when it ended and
+any attributes the stage attaches (bytes, rows, status, ...) are collected and written as one JSON line per run to
+``RUN_RECORD_PATH`` (default ``run_records.jsonl``). Outside a run, spans cost
+two clock reads. With ``RUN_OTEL=1`` and the ``opentelemetry`` API installed,
+the spans are also replayed to the globally configured tracer. Work handed
+to a thread pool goes through ``submit`` so its spans keep their parent.
+"""
+
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+from tools.settings import env_flag
+
+try:
+    import resource
+except ImportError:  # POSIX only; on Windows memory is not recorded
+    resource = None
+
+_current_run = None
+_run_lock = threading.Lock()
+_parent_span = contextvars.ContextVar('parent_span', default=None)
+
+
+def process_peak_rss_mb() -> float:
+    """Peak RSS of the whole process so far (``ru_maxrss``), not of any one span."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class RunRecord:
+    def __init__(self, mode: str, run_id: str = None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.mode = mode
+        self.started_at = time.time()
+        self.started_perf = time.perf_counter()
+        self.spans = []
+
+    def add(self, entry: dict) -> None:
+        with _run_lock:
+            self.spans.append(entry)
+
+    def to_dict(self, status: str, error: str = None) -> dict:
+        return {
+            'run_id': self.run_id,
+            'mode': self.mode,
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+            'wall_seconds': round(time.perf_counter() - self.started_perf, 4),
+            'status': status,
+            'error': error,
+            'process_peak_rss_mb': process_peak_rss_mb(),
+            'spans': self.spans,
+        }
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block; the yielded dict can be filled with extra attributes."""
+    span_id = uuid.uuid4().hex[:8]
+    parent = _parent_span.get()
+    token = _parent_span.set(span_id)
+    started_at = time.time()
+    started = time.perf_counter()
+    error = None
+    try:
+        yield attributes
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _parent_span.reset(token)
+        run = _current_run
+        if run is not None:
+            run.add({
+                'name': name,
+                'span_id': span_id,
+                'parent_id': parent,
+                'start_offset': round(started - run.started_perf, 4),
+                'started_at': started_at,
+                'seconds': round(time.perf_counter() - started, 4),
+                'process_peak_rss_mb': process_peak_rss_mb(),
+                'error': error,
+                'attributes': attributes,
+            })
+
+
+def record_span(name: str, started_at: float, seconds: float, **attributes) -> None:
+    """Record a span timed elsewhere, e.g. by an LLM callback."""
+    run = _current_run
+    if run is None:
+        return
+    run.add({
+        'name': name,
+        'span_id': uuid.uuid4().hex[:8],
+        'parent_id': _parent_span.get(),
+        'start_offset': round(started_at - run.started_at, 4),
+        'started_at': started_at,
+        'seconds': round(seconds, 4),
+        'process_peak_rss_mb': process_peak_rss_mb(),
+        'error': attributes.pop('error', None),
+        'attributes': attributes,
+    })
+
+
+def submit(pool, fn, *args, **kwargs):
+    """``pool.submit`` running ``fn`` in a copy of the caller's context, so its spans nest under the current one."""
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def current_run_id() -> str:
+    """Id of the run being recorded, or None outside ``recording_run``."""
+    run = _current_run
+    return run.run_id if run is not None else None
+
+
+@contextmanager
+def recording_run(mode: str, run_id: str = None):
+    global _current_run
+    run = RunRecord(mode, run_id)
+    _current_run = run
+    status, error = 'success', None
+    try:
+        yield run
+    except BaseException as e:
+        status, error = 'failed', f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_run = None
+        record = run.to_dict(status, error)
+        _write_record(record)
+        if env_flag("RUN_OTEL"):
+            _export_otel(record)
+
+
+def _write_record(record: dict) -> None:
+    path = os.getenv("RUN_RECORD_PATH", "run_records.jsonl")
+    try:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, default=str) + "\n")
+    except OSError as e:
+        print(f"⚠️ Could not write run record: {e}")
+
+
+def _export_otel(record: dict) -> None:
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        print("⚠️ RUN_OTEL is set but opentelemetry is not installed")
+        return
+    tracer = trace.get_tracer("daily_business_report")
+    run_start_ns = int(record['spans'][0]['started_at'] * 1e9) if record['spans'] else time.time_ns()
+    root = tracer.start_span(f"report_run.{record['mode']}", start_time=run_start_ns,
+                             attributes={'run.id': record['run_id'], 'run.status': record['status']})
+    contexts = {None: trace.set_span_in_context(root)}
+    for entry in sorted(record['spans'], key=lambda s: s['started_at']):
+        start_ns = int(entry['started_at'] * 1e9)
+        attributes = {k: v for k, v in entry['attributes'].items() if isinstance(v, (str, bool, int, float))}
+        if entry['process_peak_rss_mb'] is not None:
+            attributes['process.peak_rss_mb'] = entry['process_peak_rss_mb']
+        otel_span = tracer.start_span(entry['name'], context=contexts.get(entry['parent_id'], contexts[None]),
+                                      start_time=start_ns, attributes=attributes)
+        contexts[entry['span_id']] = trace.set_span_in_context(otel_span)
+        otel_span.end(end_time=start_ns + int(entry['seconds'] * 1e9))
+    root.end()
@@ -0,0 +1,131 @@
+"""
+On-disk cache for the CrewAI agents' LLM calls.
+
+The agents see nearly the same prompts every day; only dates, timestamps and
+file names change. Prompts are keyed with those values templated out, and the
+cached response is stored with the same values replaced by numbered
+placeholders, so a hit replays the earlier plan with today's dates and paths
+filled back in. Entries live in SQLite with a TTL and least-recently-used
+eviction. ``agents.ReportLLM`` consults it in ``call``, the one method crewai
+uses to reach the model.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from tools.settings import env_flag
+
+# Order matters: datetimes before dates, so a timestamp is one placeholder
+VOLATILE_PATTERNS = [
+    ('DATETIME', re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?')),
+    ('DATE', re.compile(r'\b(?:\d{4}-\d{2}-\d{2}|\d{2}[-/]\d{2}[-/]\d{4})\b')),
+    ('PATH', re.compile(r'(?:[A-Za-z]:)?[\w.\\/-]*\.(?:csv|xlsx|xls|pkl|parquet|txt|json)\b')),
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+
+
+def llm_cache_enabled() -> bool:
+    return env_flag("LLM_CACHE", default=True)
+
+
+def template_prompt(prompt: str) -> tuple:
+    """The prompt with volatile values replaced by numbered placeholders, and the placeholder -> value pairs."""
+    values = []
+
+    def replace(kind):
+        def substitute(match):
+            placeholder = f"<<{kind}_{len(values)}>>"
+            values.append((placeholder, match.group(0)))
+            return placeholder
+        return substitute
+
+    for kind, pattern in VOLATILE_PATTERNS:
+        prompt = pattern.sub(replace(kind), prompt)
+    return prompt, values
+
+
+class LLMResponseCache:
+    def __init__(self, path: str = None, ttl_hours: float = None, max_entries: int = None):
+        self.path = path or os.getenv("LLM_CACHE_PATH", os.path.join(".llm_cache", "responses.sqlite"))
+        self.ttl = 3600 * (ttl_hours if ttl_hours is not None else float(os.getenv("LLM_CACHE_TTL_HOURS", "168")))
+        self.max_entries = max_entries or int(os.getenv("LLM_CACHE_MAX_ENTRIES", "500"))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute(SCHEMA)
+        return connection
+
+    @staticmethod
+    def _key(template: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\n{template}".encode('utf-8')).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> str:
+        """The cached response text for ``prompt`` with today's volatile values filled in, or None."""
+        template, values = template_prompt(prompt)
+        key = self._key(template, llm_string)
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            row = connection.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                connection.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                connection.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        # Put today's dates and paths back where the cached response used the old ones
+        value = row[0]
+        for placeholder, current in values:
+            value = value.replace(placeholder, current)
+        return json.loads(value)
+
+    def update(self, prompt: str, llm_string: str, response: str) -> None:
+        template, values = template_prompt(prompt)
+        value = json.dumps(response)
+        # Prompt and response are both JSON-serialized, so values appear escaped the same way.
+        # Longest first so a path containing a date is templated as the path.
+        for placeholder, original in sorted(values, key=lambda pair: -len(pair[1])):
+            value = value.replace(original, placeholder)
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (self._key(template, llm_string), value, now, now),
+            )
+            connection.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+            connection.execute(
+                "DELETE FROM llm_cache WHERE key NOT IN (SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'hit_rate': round(self.hits / total, 3) if total else None}
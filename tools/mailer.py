@@ -0,0 +1,144 @@
+import io
+import os
+import smtplib
+import zipfile
+from email import encoders
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from tools.instrumentation import span
+from tools.settings import env_flag
+
+
+def smtp_credentials() -> tuple:
+    """``EMAIL_ADDRESS``/``EMAIL_PASSWORD`` with stray whitespace and non-breaking spaces cleaned."""
+    sender_email = os.getenv("EMAIL_ADDRESS")
+    sender_password = os.getenv("EMAIL_PASSWORD")
+    # Clean credentials to remove any non-ASCII characters
+    if sender_email:
+        sender_email = sender_email.strip().replace('\xa0', ' ')
+    if sender_password:
+        sender_password = sender_password.strip().replace('\xa0', ' ')
+    return sender_email, sender_password
+
+
+def compress_threshold() -> int:
+    """Attachments larger than ``EMAIL_COMPRESS_OVER_MB`` are zipped; None when unset."""
+    limit = os.getenv("EMAIL_COMPRESS_OVER_MB", "").strip()
+    return int(float(limit) * 1024 * 1024) if limit else None
+
+
+def attachment_part(path: str, compress_over: int = None) -> MIMEBase:
+    with open(path, "rb") as attachment:
+        payload = attachment.read()
+    filename = os.path.basename(path)
+    if compress_over is not None and len(payload) > compress_over:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(filename, payload)
+        payload, filename = buffer.getvalue(), f"{filename}.zip"
+        part = MIMEBase('application', 'zip')
+    else:
+        part = MIMEBase('application', 'octet-stream')
+    part.set_payload(payload)
+    encoders.encode_base64(part)
+    part.add_header('Content-Disposition', f'attachment; filename="{filename}"')
+    return part
+
+
+def build_message(sender: str, to: list, cc: list, subject: str, body: str, attachments: list,
+                  compress_over: int = None) -> MIMEMultipart:
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = ", ".join(to)
+    if cc:
+        msg['Cc'] = ", ".join(cc)
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    for path in attachments:
+        msg.attach(attachment_part(path, compress_over))
+    return msg
+
+
+class MailDispatcher:
+    """Sends a batch of messages over one authenticated SMTP connection.
+
+    The connection is opened on the first send and reused for the rest of the
+    batch. If the server drops it, the dispatcher reconnects and resumes with
+    the message that failed, so messages already accepted are never sent twice.
+    Each message is flattened in memory by ``send_message`` before it is sent,
+    so attachment size still bounds memory; large files should be compressed
+    (``EMAIL_COMPRESS_OVER_MB``) rather than relied on to stream.
+    """
+
+    def __init__(self, username: str, password: str, host: str = None, port: int = None,
+                 starttls: bool = None, max_reconnects: int = 2):
+        self.username = username
+        self.password = password
+        self.host = host or os.getenv("SMTP_HOST", "smtp.gmail.com")
+        self.port = port or int(os.getenv("SMTP_PORT", "587"))
+        if starttls is None:
+            starttls = env_flag("SMTP_STARTTLS", default=True)
+        self.starttls = starttls
+        self.max_reconnects = max_reconnects
+        self.server = None
+        self.delivered = []
+
+    def connect(self) -> None:
+        with span('smtp_connect', host=self.host):
+            server = smtplib.SMTP(self.host, self.port)
+            if self.starttls:
+                server.starttls()
+            server.login(self.username, self.password)
+        self.server = server
+
+    def send(self, msg, recipients: list) -> None:
+        for attempt in range(self.max_reconnects + 1):
+            if self.server is None:
+                self.connect()
+            try:
+                with span('smtp_send', recipients=len(recipients)):
+                    self.server.send_message(msg, to_addrs=recipients)
+                break
+            except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+                self._drop()
+                if attempt == self.max_reconnects:
+                    raise
+                print(f"⚠️ SMTP connection lost ({e}), reconnecting...")
+        self.delivered.append(recipients)
+
+    def send_all(self, deliveries, on_sent=None) -> int:
+        """Send ``(message, recipients)`` pairs in order; returns how many this batch delivered.
+
+        ``on_sent`` is called with each pair's index as soon as the server accepts it.
+        """
+        before = len(self.delivered)
+        for index, (msg, recipients) in enumerate(deliveries):
+            self.send(msg, recipients)
+            if on_sent:
+                on_sent(index)
+        return len(self.delivered) - before
+
+    def _drop(self) -> None:
+        try:
+            self.server.close()
+        except OSError:
+            pass
+        self.server = None
+
+    def close(self) -> None:
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            # Everything was already accepted; a failed goodbye is harmless
+            pass
+        self.server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,91 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+from tools.fileio import atomic_path
+from tools.settings import env_flag
+
+
+def incremental_enabled() -> bool:
+    return env_flag("UNIWARE_INCREMENTAL")
+
+
+class OrderStore:
+    """Month-to-date copy of the Uniware sale orders already fetched.
+
+    Each run only exports orders added since the last successful run (minus a
+    look-back window) and merges that delta in, replacing every row of a
+    re-exported sale order. The export filters on the date an order was
+    added, so the look-back only catches cancellations and returns of orders
+    added within it; a change to an older order is picked up by the full-month
+    re-export made every ``UNIWARE_FULL_REFRESH_DAYS``, which replaces the
+    store outright.
+    """
+
+    def __init__(self, directory: str = None, lookback_days: int = None, full_refresh_days: int = None):
+        self.directory = directory or os.getenv("UNIWARE_STORE_DIR", "uniware_store")
+        if lookback_days is None:
+            lookback_days = int(os.getenv("UNIWARE_LOOKBACK_DAYS", "3"))
+        self.lookback = timedelta(days=lookback_days)
+        if full_refresh_days is None:
+            full_refresh_days = int(os.getenv("UNIWARE_FULL_REFRESH_DAYS", "7"))
+        self.full_refresh = timedelta(days=full_refresh_days)
+        self.orders_path = os.path.join(self.directory, "orders.pkl")
+        self.state_path = os.path.join(self.directory, "state.json")
+
+    def _load_state(self) -> dict:
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _is_current(self, state: dict, month_start: datetime) -> bool:
+        return state.get('month') == month_start.strftime('%Y-%m') and os.path.exists(self.orders_path)
+
+    def export_window_start(self, month_start: datetime) -> datetime:
+        """Start of the next export window; the full month when the store is empty, stale or due a refresh."""
+        state = self._load_state()
+        if not self._is_current(state, month_start) or not state.get('last_success') or not state.get('last_full'):
+            return month_start
+        if datetime.fromisoformat(state['last_success']) - datetime.fromisoformat(state['last_full']) >= self.full_refresh:
+            print("🔄 Re-exporting the whole month to pick up status changes on older orders")
+            return month_start
+        start = datetime.fromisoformat(state['last_success']) - self.lookback
+        start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        return max(start, month_start)
+
+    def merge(self, delta_file: str, month_start: datetime, window_start: datetime, window_end: datetime) -> str:
+        """Fold a delta export into the store and return the path of the merged orders.
+
+        A delta starting at ``month_start`` is a full-month export and replaces the store.
+        """
+        import pandas as pd
+
+        delta = pd.read_csv(delta_file)
+        state = self._load_state()
+        full = window_start <= month_start
+        if self._is_current(state, month_start) and not full:
+            stored = pd.read_pickle(self.orders_path)
+            # A re-exported order carries its latest status, so it supersedes what we had
+            stored = stored[~stored['Sale Order Code'].isin(delta['Sale Order Code'])]
+            merged = pd.concat([stored, delta], ignore_index=True)
+        else:
+            merged = delta
+
+        os.makedirs(self.directory, exist_ok=True)
+        with atomic_path(self.orders_path) as tmp_path:
+            merged.to_pickle(tmp_path)
+
+        state = {
+            'month': month_start.strftime('%Y-%m'),
+            'last_success': window_end.isoformat(),
+            'last_full': window_end.isoformat() if full else state.get('last_full'),
+            'rows': len(merged),
+        }
+        with open(self.state_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        print(f"🗃️ Merged {len(delta)} delta row(s) into order store ({len(merged)} total)")
+        return self.orders_path
@@ -0,0 +1,162 @@
+"""
+Streaming Excel report writer.
+
+Sheets are written through openpyxl's write-only workbook: every appended row
+goes straight to a per-sheet temporary file instead of being kept as cell
+objects, so memory stays flat however many order rows the detail sheets hold.
+Column widths and number formats are fixed when a sheet is opened, before its
+first row is written.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.utils import get_column_letter
+
+from tools.analysis import DAILY_COLUMNS, mtd_orders
+from tools.fileio import atomic_path
+from tools.sales_cube import STATUS_COLUMNS, SalesCube
+from tools.settings import env_flag
+
+EXCEL_MAX_ROWS = 1_048_576
+MAX_COLUMN_WIDTH = 60
+
+# The header style pandas' to_excel applies, so the summary sheet reads exactly as before
+_THIN = Side(style='thin')
+HEADER_FONT = Font(bold=True)
+HEADER_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='top')
+
+# Report layout
+SUMMARY_SHEET = 'Sheet1'  # the name to_excel gave the only sheet
+DAILY_SHEET = 'Daily by Channel'
+STATUS_SHEET = 'Status by Channel'
+ORDERS_SHEET = 'Orders'
+DAILY_FORMATS = {'Date': 'yyyy-mm-dd', 'Qty': '0', 'Amt': '#,##0.00'}
+DAILY_WIDTHS = {'Date': 12, 'Channel Name': 28, 'Qty': 8, 'Amt': 14}
+STATUS_FORMATS = {'Rows': '0', 'Qty': '0', 'Amt': '#,##0.00'}
+STATUS_WIDTHS = {'Channel Name': 28, 'Status': 18, 'Counted': 9, 'Rows': 8, 'Qty': 8, 'Amt': 14}
+ORDER_FORMATS = {'Created': 'yyyy-mm-dd hh:mm:ss', 'Total Price': '#,##0.00'}
+ORDER_WIDTHS = {'Created': 20, 'Channel Name': 28, 'Sale Order Status': 18, 'Sale Order Code': 24, 'Total Price': 14}
+
+
+def detail_sheets_enabled() -> bool:
+    return env_flag("REPORT_DETAIL_SHEETS")
+
+
+def cell_value(value):
+    # openpyxl writes NaN as the text 'nan' and cannot store NaT, so both become blanks
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, (np.integer, np.floating, np.bool_)):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def fitted_width(column: str, values: pd.Series) -> float:
+    lengths = values.astype(str).str.len()
+    longest = max(len(str(column)), int(lengths.max()) if len(lengths) else 0)
+    return min(longest + 2, MAX_COLUMN_WIDTH)
+
+
+class SheetStream:
+    """Appends rows to a write-only sheet, continuing on '<title> (2)', ... past Excel's row limit."""
+
+    def __init__(self, workbook: Workbook, title: str, columns: list, number_formats: dict = None,
+                 widths: dict = None):
+        self.workbook = workbook
+        self.title = title
+        self.columns = list(columns)
+        number_formats = number_formats or {}
+        self._formats = [(i, number_formats[col]) for i, col in enumerate(self.columns) if col in number_formats]
+        self.widths = widths or {}
+        self.rows = 0
+        self._parts = 0
+        self._open_sheet()
+
+    def _open_sheet(self) -> None:
+        self._parts += 1
+        title = self.title if self._parts == 1 else f"{self.title} ({self._parts})"
+        sheet = self.workbook.create_sheet(title[:31])
+        # Column dimensions are written with the sheet header, so they must be set before any row
+        for index, column in enumerate(self.columns, start=1):
+            sheet.column_dimensions[get_column_letter(index)].width = self.widths.get(column, len(str(column)) + 2)
+        header = []
+        for column in self.columns:
+            cell = WriteOnlyCell(sheet, value=column)
+            cell.font, cell.border, cell.alignment = HEADER_FONT, HEADER_BORDER, HEADER_ALIGNMENT
+            header.append(cell)
+        sheet.append(header)
+        self._sheet = sheet
+        self._sheet_rows = 1
+
+    def append(self, row) -> None:
+        if self._sheet_rows >= EXCEL_MAX_ROWS:
+            self._open_sheet()
+        values = [cell_value(value) for value in row]
+        for index, number_format in self._formats:
+            if values[index] is not None:
+                cell = WriteOnlyCell(self._sheet, value=values[index])
+                cell.number_format = number_format
+                values[index] = cell
+        self._sheet.append(values)
+        self._sheet_rows += 1
+        self.rows += 1
+
+    def extend(self, rows) -> None:
+        for row in rows:
+            self.append(row)
+
+
+class ReportWriter:
+    """Write-only workbook saved atomically to ``path`` when the ``with`` block exits cleanly.
+
+    Sheets appear in the order they are opened, and rows may be appended to
+    any open sheet at any time.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+
+    def sheet(self, title: str, columns: list, number_formats: dict = None, widths: dict = None) -> SheetStream:
+        return SheetStream(self.workbook, title, columns, number_formats, widths)
+
+    def write_frame(self, title: str, frame: pd.DataFrame, number_formats: dict = None) -> SheetStream:
+        """Write a frame that is already in memory, sizing each column to its contents."""
+        widths = {column: fitted_width(column, frame[column]) for column in frame.columns}
+        stream = self.sheet(title, frame.columns, number_formats, widths)
+        stream.extend(frame.itertuples(index=False, name=None))
+        return stream
+
+    def save(self) -> None:
+        with atomic_path(self.path) as tmp_path:
+            self.workbook.save(tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.save()
+
+
+def write_detail_sheets(writer: ReportWriter, cube: SalesCube, columns: list, frames) -> int:
+    """Add the daily-by-channel and status-by-channel sheets from ``cube`` and the MTD orders from ``frames``.
+
+    Returns the number of order rows written.
+    """
+    writer.sheet(DAILY_SHEET, DAILY_COLUMNS, DAILY_FORMATS, DAILY_WIDTHS).extend(
+        cube.daily_channel_totals().itertuples(index=False, name=None))
+    writer.sheet(STATUS_SHEET, STATUS_COLUMNS, STATUS_FORMATS, STATUS_WIDTHS).extend(
+        cube.status_totals().itertuples(index=False, name=None))
+    orders_sheet = writer.sheet(ORDERS_SHEET, columns, ORDER_FORMATS, ORDER_WIDTHS)
+    for frame in frames:
+        orders_sheet.extend(mtd_orders(frame, cube.previous_day, cube.start_of_month).itertuples(index=False, name=None))
+    return orders_sheet.rows
@@ -0,0 +1,125 @@
+import os
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from tools.settings import env_flag
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    day TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    qty INTEGER NOT NULL,
+    amt REAL NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (day, channel)
+);
+CREATE TABLE IF NOT EXISTS rollup_days (
+    day TEXT PRIMARY KEY,
+    updated_at TEXT NOT NULL
+);
+"""
+
+
+def rollups_enabled() -> bool:
+    return env_flag("REPORT_ROLLUPS")
+
+
+def _day(value) -> str:
+    return (value.date() if isinstance(value, datetime) else value).isoformat()
+
+
+class RollupStore:
+    """Finalized per-day, per-channel Qty/Amt kept in SQLite.
+
+    Every analysis run rewrites the days it has just recomputed, so late
+    cancellations and returns replace what was stored. Any period total is a
+    sum over at most (days x channels) stored rows, however long the period,
+    instead of a scan of the raw orders.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(os.getenv("UNIWARE_STORE_DIR", "uniware_store"), "rollups.sqlite")
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def replace_days(self, start, end, daily: pd.DataFrame) -> int:
+        """Replace the stored rollups for ``start..end`` (inclusive) with ``daily``.
+
+        ``daily`` has the ``Date``, ``Channel Name``, ``Qty`` and ``Amt``
+        columns of ``SalesCube.daily_channel_totals``. A channel missing from a recomputed
+        day (e.g. all of its orders were cancelled) loses its stored row.
+        """
+        if pd.Timestamp(start) > pd.Timestamp(end):
+            raise ValueError(f"Rollup window starts after it ends ({_day(start)}..{_day(end)})")
+        updated_at = datetime.now().isoformat(timespec='seconds')
+        rows = [
+            (_day(pd.Timestamp(day)), str(channel), int(qty), float(amt), updated_at)
+            for day, channel, qty, amt in daily[['Date', 'Channel Name', 'Qty', 'Amt']].itertuples(index=False, name=None)
+        ]
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM daily_rollups WHERE day BETWEEN ? AND ?", (_day(start), _day(end)))
+            connection.executemany(
+                "INSERT INTO daily_rollups (day, channel, qty, amt, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (day, channel) DO UPDATE SET qty = excluded.qty, amt = excluded.amt, "
+                "updated_at = excluded.updated_at",
+                rows,
+            )
+            # Days without any counted order are still finalized, so they are recorded separately
+            days = pd.date_range(_day(start), _day(end), freq='D')
+            connection.executemany(
+                "INSERT OR REPLACE INTO rollup_days (day, updated_at) VALUES (?, ?)",
+                [(_day(day), updated_at) for day in days],
+            )
+        return len(rows)
+
+    def period_totals(self, start, end) -> pd.DataFrame:
+        """Per-channel ``qty`` and ``amt`` summed over ``start..end`` (inclusive)."""
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT channel, SUM(qty), SUM(amt) FROM daily_rollups WHERE day BETWEEN ? AND ? GROUP BY channel",
+                (_day(start), _day(end)),
+            ).fetchall()
+        return pd.DataFrame(rows, columns=['channel', 'qty', 'amt']).set_index('channel')
+
+    def covered_days(self, start, end) -> int:
+        """How many days of ``start..end`` have been rolled up."""
+        with closing(self._connect()) as connection:
+            return connection.execute(
+                "SELECT COUNT(*) FROM rollup_days WHERE day BETWEEN ? AND ?", (_day(start), _day(end)),
+            ).fetchone()[0]
+
+
+def comparison_periods(previous_day) -> dict:
+    """Label -> (start, end) for the comparison columns, all ending on or before ``previous_day``."""
+    day = previous_day.date() if isinstance(previous_day, datetime) else previous_day
+    last_week = day - timedelta(days=7)
+    last_month_end = day.replace(day=1) - timedelta(days=1)
+    last_month_day = last_month_end.replace(day=min(day.day, last_month_end.day))
+    return {
+        'YTD': (date(day.year, 1, 1), day),
+        last_week.strftime('%d-%m-%Y'): (last_week, last_week),
+        'PrevMTD': (last_month_end.replace(day=1), last_month_day),
+    }
+
+
+def comparison_columns(store: RollupStore, previous_day) -> pd.DataFrame:
+    """``Qty_<label>``/``Amt_<label>`` per channel for every comparison period."""
+    columns = {}
+    for label, (start, end) in comparison_periods(previous_day).items():
+        expected = (end - start).days + 1
+        covered = store.covered_days(start, end)
+        if covered < expected:
+            print(f"⚠️ Rollups cover {covered}/{expected} day(s) of {label} ({start}..{end}); totals are partial")
+        totals = store.period_totals(start, end)
+        columns[f'Qty_{label}'] = totals['qty'].astype('int64')
+        columns[f'Amt_{label}'] = totals['amt'].astype('float64')
+    return pd.DataFrame(columns).fillna(0).astype({name: 'int64' for name in columns if name.startswith('Qty_')})
@@ -0,0 +1,154 @@
+"""
+Per-report-date run manifest.
+
+Each stage records its inputs and the paths and SHA-256 of what it wrote in
+``<RUN_MANIFEST_DIR>/<report date>.json``. A re-run for the same date resumes
+at the first stage whose record is missing, whose inputs changed or whose
+outputs are gone or were modified, and the email stage never sends twice for
+one date: each message is marked as sent the moment the server accepts it. ``--force`` (or ``REPORT_FORCE=1``) ignores the manifest.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from datetime import date, datetime
+
+from tools.fileio import write_json
+from tools.settings import env_flag
+
+
+def force_requested() -> bool:
+    if '--force' in sys.argv[1:]:
+        return True
+    return env_flag("REPORT_FORCE")
+
+
+# (path, size, mtime) -> SHA-256, so the manifest, the artifact index and the caches hash a file once
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+def _digest_key(path: str) -> tuple:
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+def prime_digest(path: str, hexdigest: str) -> None:
+    """Record a digest computed while the file was being written (e.g. streamed)."""
+    with _digests_lock:
+        _digests[_digest_key(path)] = hexdigest
+
+
+def file_digest(path: str) -> str:
+    key = _digest_key(path)
+    with _digests_lock:
+        cached = _digests.get(key)
+    if cached:
+        return cached
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    value = digest.hexdigest()
+    with _digests_lock:
+        _digests[key] = value
+    return value
+
+
+class RunManifest:
+    def __init__(self, report_date: date, directory: str = None, force: bool = None):
+        self.report_date = report_date
+        self.directory = directory or os.getenv("RUN_MANIFEST_DIR", os.path.join("uniware_store", "manifests"))
+        self.path = os.path.join(self.directory, f"{report_date:%Y-%m-%d}.json")
+        self.force = force_requested() if force is None else force
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, manifest: dict) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        write_json(self.path, manifest, indent=2)
+
+    def stage(self, name: str) -> dict:
+        return self._load().get('stages', {}).get(name)
+
+    def done(self, name: str) -> dict:
+        """The stage's recorded outputs if it finished for this date (and not forced), otherwise None."""
+        record = self.stage(name)
+        if self.force or not record or record.get('status') != 'done':
+            return None
+        return record['outputs']
+
+    def completed(self, name: str, inputs: dict = None) -> dict:
+        """The stage's recorded outputs if it can be skipped, otherwise None.
+
+        ``inputs`` must match what was recorded (when given), and every output
+        file must still exist with its recorded hash.
+        """
+        if self.done(name) is None:
+            return None
+        record = self.stage(name)
+        if inputs is not None and record.get('inputs') != inputs:
+            return None
+        for key, path in record['outputs'].items():
+            expected = record['hashes'].get(key)
+            if expected and (not os.path.exists(path) or file_digest(path) != expected):
+                return None
+        return record['outputs']
+
+    def record(self, name: str, outputs: dict, inputs: dict = None) -> None:
+        digests = {}
+        for path in outputs.values():
+            if isinstance(path, str) and path not in digests and os.path.isfile(path):
+                digests[path] = file_digest(path)
+        hashes = {key: digests[path] for key, path in outputs.items() if isinstance(path, str) and path in digests}
+        with self._lock:
+            manifest = self._load()
+            manifest['report_date'] = f"{self.report_date:%Y-%m-%d}"
+            stages = manifest.setdefault('stages', {})
+            stages[name] = {
+                'status': 'done',
+                'inputs': inputs or {},
+                'outputs': outputs,
+                'hashes': hashes,
+                'progress': (stages.get(name) or {}).get('progress', {}),
+                'finished_at': datetime.now().isoformat(timespec='seconds'),
+            }
+            self._save(manifest)
+
+    def mark(self, name: str, key: str, value) -> None:
+        """Record one finished unit of a stage still in progress (e.g. one message sent)."""
+        with self._lock:
+            manifest = self._load()
+            manifest['report_date'] = f"{self.report_date:%Y-%m-%d}"
+            record = manifest.setdefault('stages', {}).setdefault(name, {'inputs': {}, 'outputs': {}, 'hashes': {}})
+            record['status'] = 'running'
+            record.setdefault('progress', {})[key] = value
+            self._save(manifest)
+
+    def progress(self, name: str) -> dict:
+        """Units of the stage already finished for this date, ``{}`` when forced."""
+        record = self.stage(name)
+        if self.force or not record:
+            return {}
+        return record.get('progress', {})
+
+    def output(self, name: str, key: str) -> str:
+        """A path a stage recorded, if it still exists."""
+        record = self.stage(name)
+        path = record['outputs'].get(key) if record else None
+        return path if isinstance(path, str) and os.path.exists(path) else None
+
+    def artifacts(self) -> list:
+        """Every file path recorded by any stage of this run."""
+        paths = []
+        for record in self._load().get('stages', {}).values():
+            paths.extend(path for path in record['outputs'].values() if isinstance(path, str))
+        return list(dict.fromkeys(paths))
@@ -0,0 +1,192 @@
+"""
+Aggregate cube of one report run.
+
+Every row of the export is counted once into a small dense array indexed by
+day (the report window, month start through the report day) x channel x
+normalized ``Sale Order Status`` x counted/excluded, holding the row count,
+Qty and Amt. The channel summary, the per-day rollups and the detail
+breakdowns are all slices and sums of that array, so a new breakdown along
+these dimensions costs no extra pass over the rows. Chunks (and streamed
+exports) build partial cubes that are merged label-aligned. The cube is
+saved next to the report as ``.cube.npz``.
+"""
+
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+
+from tools.analysis import (DAILY_COLUMNS, TOTAL_COLUMNS, channel_codes, day_numbers, exclusion_mask, order_weights,
+                            report_chunks)
+from tools.exclusions import DEFAULT_NORMALIZE, normalize_values
+from tools.instrumentation import span
+
+STATUS_COLUMN = 'Sale Order Status'
+# Read-ahead when parsing an export straight off the download
+STREAM_BUFFER_BYTES = 1024 * 1024
+MEASURES = ('rows', 'qty', 'amt')
+STATUS_COLUMNS = ['Channel Name', 'Status', 'Counted', 'Rows', 'Qty', 'Amt']
+
+
+def status_codes(df: pd.DataFrame) -> tuple:
+    """Integer status code per row plus the normalized statuses they index ('' when absent)."""
+    if STATUS_COLUMN not in df.columns:
+        return np.zeros(len(df), dtype=np.int64), pd.Index([''])
+    codes, uniques = pd.factorize(df[STATUS_COLUMN], use_na_sentinel=False)
+    normalized = normalize_values(pd.Index(uniques).astype(object).where(pd.notna(uniques), ''), DEFAULT_NORMALIZE)
+    merged_codes, names = pd.factorize(normalized)
+    return merged_codes[codes], pd.Index(names)
+
+
+def _align(values: np.ndarray, axis: int, labels: pd.Index, target: pd.Index) -> np.ndarray:
+    if labels.equals(target):
+        return values
+    shape = list(values.shape)
+    shape[axis] = len(target)
+    aligned = np.zeros(shape, dtype=values.dtype)
+    index = [slice(None)] * values.ndim
+    index[axis] = target.get_indexer(labels)
+    aligned[tuple(index)] = values
+    return aligned
+
+
+class SalesCube:
+    """``values[measure, day, channel, status, counted]`` over the report window."""
+
+    def __init__(self, previous_day, start_of_month, channels: pd.Index, statuses: pd.Index, values: np.ndarray):
+        self.previous_day = pd.Timestamp(previous_day).normalize()
+        self.start_of_month = pd.Timestamp(start_of_month).normalize()
+        # On the 1st the MTD window is empty but the report day (last month's) is still counted
+        self.first_day = min(self.start_of_month, self.previous_day)
+        self.channels = channels
+        self.statuses = statuses
+        self.values = values
+
+    @property
+    def days(self) -> int:
+        return (self.previous_day - self.first_day).days + 1
+
+    @property
+    def mtd_start(self) -> int:
+        """Day index where the MTD window starts (``days`` when it is empty)."""
+        return (self.start_of_month - self.first_day).days
+
+    @classmethod
+    def empty(cls, previous_day, start_of_month) -> 'SalesCube':
+        cube = cls(previous_day, start_of_month, pd.Index([], dtype=object), pd.Index([''], dtype=object), None)
+        cube.values = np.zeros((len(MEASURES), cube.days, 0, 1, 2))
+        return cube
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, previous_day, start_of_month) -> 'SalesCube':
+        cube = cls.empty(previous_day, start_of_month)
+        with span('filter', rows=len(df)) as attrs:
+            day = day_numbers(df['Created'])
+            first = np.datetime64(cube.first_day.date(), 'D')
+            offset = (day - first).astype(np.int64)
+            in_window = ~np.isnat(day) & (offset >= 0) & (offset < cube.days)
+            counted = ~exclusion_mask(df)
+            attrs['kept_rows'] = int(np.count_nonzero(in_window & counted))
+
+        with span('aggregate', rows=len(df)) as attrs:
+            channels, cube.channels = channel_codes(df['Channel Name'])
+            statuses, cube.statuses = status_codes(df)
+            has_code, price = order_weights(df)
+
+            width_c, width_s = len(cube.channels), len(cube.statuses)
+            key = ((offset * width_c + channels) * width_s + statuses) * 2 + counted
+            key = key[in_window]
+            size = cube.days * width_c * width_s * 2
+            shape = (cube.days, width_c, width_s, 2)
+            cube.values = np.stack([
+                np.bincount(key, minlength=size).astype(np.float64).reshape(shape),
+                np.bincount(key, weights=has_code[in_window], minlength=size).reshape(shape),
+                np.bincount(key, weights=price[in_window], minlength=size).reshape(shape),
+            ])
+            attrs.update(channels=width_c, statuses=width_s)
+        return cube
+
+    def merge(self, other: 'SalesCube') -> 'SalesCube':
+        channels = self.channels.append(other.channels.difference(self.channels, sort=False))
+        statuses = self.statuses.append(other.statuses.difference(self.statuses, sort=False))
+        values = _align(_align(self.values, 2, self.channels, channels), 3, self.statuses, statuses)
+        values = values + _align(_align(other.values, 2, other.channels, channels), 3, other.statuses, statuses)
+        return SalesCube(self.previous_day, self.start_of_month, channels, statuses, values)
+
+    def _counted(self) -> np.ndarray:
+        """``[measure, day, channel]`` over counted rows, all statuses."""
+        return self.values[..., 1].sum(axis=3)
+
+    def channel_totals(self) -> pd.DataFrame:
+        """Per-channel daily and MTD rows, Qty and Amt (the ``TOTAL_COLUMNS`` frame)."""
+        counted = self._counted()
+        daily = counted[:, -1, :]
+        mtd = counted[:, self.mtd_start:, :].sum(axis=1)
+        return pd.DataFrame({
+            'daily_rows': daily[0].astype(np.int64),
+            'daily_qty': daily[1].astype(np.int64),
+            'daily_amt': daily[2],
+            'mtd_rows': mtd[0].astype(np.int64),
+            'mtd_qty': mtd[1].astype(np.int64),
+            'mtd_amt': mtd[2],
+        }, index=self.channels, columns=TOTAL_COLUMNS)
+
+    def daily_channel_totals(self, whole_window: bool = False) -> pd.DataFrame:
+        """Qty and Amt per day and channel that had counted rows, sorted by day then channel.
+
+        Covers the MTD days, or with ``whole_window`` every day from ``first_day``
+        (which adds the report day on the 1st, when the MTD window is empty).
+        """
+        start = 0 if whole_window else self.mtd_start
+        counted = self._counted()[:, start:, :]
+        days, channels = np.nonzero(counted[0])
+        daily = pd.DataFrame({
+            'Date': np.datetime64(self.first_day.date(), 'D') + start + days,
+            'Channel Name': self.channels[channels].astype(object),
+            'Qty': counted[1, days, channels].astype(np.int64),
+            'Amt': counted[2, days, channels],
+        }, columns=DAILY_COLUMNS)
+        return daily.sort_values(['Date', 'Channel Name'], ignore_index=True)
+
+    def status_totals(self) -> pd.DataFrame:
+        """MTD rows, Qty and Amt per channel and status, excluded rows included and flagged."""
+        mtd = self.values[:, self.mtd_start:].sum(axis=1)
+        channels, statuses, counted = np.nonzero(mtd[0])
+        totals = pd.DataFrame({
+            'Channel Name': self.channels[channels].astype(object),
+            'Status': self.statuses[statuses].astype(object),
+            'Counted': np.where(counted == 1, 'yes', 'no'),
+            'Rows': mtd[0, channels, statuses, counted].astype(np.int64),
+            'Qty': mtd[1, channels, statuses, counted].astype(np.int64),
+            'Amt': mtd[2, channels, statuses, counted],
+        }, columns=STATUS_COLUMNS)
+        return totals.sort_values(['Channel Name', 'Counted', 'Status'], ascending=[True, False, True], ignore_index=True)
+
+    def save(self, path: str) -> None:
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f, values=self.values, channels=self.channels.to_numpy(dtype=str), statuses=self.statuses.to_numpy(dtype=str),
+                window=np.array([self.previous_day.date(), self.start_of_month.date()], dtype='datetime64[D]'),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> 'SalesCube':
+        with np.load(path) as data:
+            previous_day, start_of_month = pd.to_datetime(data['window'])
+            return cls(previous_day, start_of_month, pd.Index(data['channels'].astype(object)),
+                       pd.Index(data['statuses'].astype(object)), data['values'])
+
+
+def chunked_cube(source, previous_day, start_of_month, chunk_rows: int, columns: list = None) -> SalesCube:
+    """Cube of an export read in bounded chunks (``source`` as for ``report_chunks``)."""
+    cube = SalesCube.empty(previous_day, start_of_month)
+    for chunk in report_chunks(source, chunk_rows, columns):
+        cube = cube.merge(SalesCube.from_frame(chunk, previous_day, start_of_month))
+    return cube
+
+
+def stream_cube(stream, previous_day, start_of_month, chunk_rows: int) -> SalesCube:
+    """Cube folded chunk by chunk from a ``tools.streaming.ByteStream`` while the export downloads."""
+    columns = next(csv.reader([stream.header()]))
+    return chunked_cube(io.BufferedReader(stream, STREAM_BUFFER_BYTES), previous_day, start_of_month, chunk_rows, columns)
@@ -0,0 +1,17 @@
+import os
+
+TRUE_VALUES = ("1", "true", "yes")
+FALSE_VALUES = ("0", "false", "no")
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    """Boolean environment setting: ``1``/``true``/``yes`` enable it, ``0``/``false``/``no`` disable it.
+
+    Unset, empty or any other value gives ``default``.
+    """
+    value = os.getenv(name, "").strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    return default
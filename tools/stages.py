@@ -0,0 +1,496 @@
+"""
+Report stages as plain functions.
+
+The CrewAI tools in ``tools/custom_tool.py`` and the direct pipeline runner in
+``pipeline.py`` both call these, so this module must not import crewai.
+
+Importing this module only loads the standard library: pandas, requests,
+openpyxl, pyarrow and PyYAML are imported inside the stage that uses them, so
+startup (and ``benchmarks/import_budget.py``) stays cheap.
+"""
+
+import csv
+import os
+import re
+import sys
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING
+
+from tools.artifact_store import ArtifactStore
+from tools.instrumentation import span, submit
+from tools.mailer import MailDispatcher, build_message, compress_threshold, smtp_credentials
+from tools.order_store import OrderStore, incremental_enabled
+from tools.run_manifest import RunManifest, file_digest
+from tools.settings import env_flag
+
+if TYPE_CHECKING:
+    from tools.sales_cube import SalesCube
+    from tools.uniware_client import UniwareClient
+
+RECIPIENTS_FILE = "knowledge/user_preference.txt"
+AUDIENCES_FILE = "config/audiences.yaml"
+REPORT_SUBJECT = "Troveas Daily Business Report"
+# Simple ASCII-only email body
+EMAIL_BODY = "Dear Sir/Madam,\n\nPlease find attached the daily business report with month-to-date figures.\n\nBest regards,\nTroveas Reporting System"
+# Rows of an in-memory export handled at a time when filling the detail sheets
+DETAIL_BATCH_ROWS = 100_000
+
+
+class StageError(Exception):
+    """A stage cannot run; the message is shown to the user as-is."""
+
+
+def report_day(as_of: date = None) -> datetime:
+    """The day a report covers: ``as_of`` when given, otherwise yesterday by the clock."""
+    return datetime.combine(as_of, datetime.min.time()) if as_of else datetime.now() - timedelta(days=1)
+
+
+def export_window(as_of: date = None) -> tuple:
+    # Month start through the end of the report day
+    yesterday = report_day(as_of)
+    month_start = yesterday.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end_of_yesterday = (yesterday + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return month_start, end_of_yesterday
+
+
+def _order_store(output_dir: str = None) -> OrderStore:
+    # Each output directory (e.g. one per tenant) keeps its own order store
+    return OrderStore(os.path.join(output_dir, "uniware_store")) if output_dir else OrderStore()
+
+
+def _rollup_store(output_dir: str = None):
+    from tools.rollup_store import RollupStore
+
+    return RollupStore(os.path.join(output_dir, "uniware_store", "rollups.sqlite")) if output_dir else RollupStore()
+
+
+def _output_path(filename: str, output_dir: str = None) -> str:
+    if not output_dir:
+        return filename
+    os.makedirs(output_dir, exist_ok=True)
+    return os.path.join(output_dir, filename)
+
+
+def _artifact_store(output_dir: str = None, tenant: str = None) -> ArtifactStore:
+    # A tenant run indexes its files in its own output_dir; backfill manages its files itself
+    if not output_dir:
+        return ArtifactStore()
+    return ArtifactStore(os.path.join(output_dir, "artifacts")) if tenant else None
+
+
+def fetch_orders(client: 'UniwareClient', start: datetime, end: datetime, filename: str,
+                 server_filters: bool = True, sink=None) -> str:
+    """Export only the columns (and, where configured, rows) the report reads, then check the header.
+
+    ``server_filters=False`` keeps excluded rows in the export, which the
+    incremental order store needs to see status changes.
+    """
+    from tools.analysis import check_export_header, export_request
+
+    columns, filters = export_request(server_filters)
+    path = client.export_sales_orders(start, end, filename, columns=columns, filters=filters, sink=sink)
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        header = next(csv.reader(f), [])
+    missing = check_export_header(header)
+    if missing:
+        raise StageError(f"Uniware export is missing column(s) {', '.join(missing)} (got: {', '.join(header)}). "
+                         "Check the column ids in tools/analysis.py EXPORT_COLUMN_IDS.")
+    return path
+
+
+def download_report(client: 'UniwareClient' = None, output_dir: str = None, manifest: RunManifest = None,
+                    sink=None) -> str:
+    """Export month-to-date sale orders from Uniware and return the local data file.
+
+    The export goes into the artifact store, under the client's tenant; with
+    an ``output_dir`` that is the store in that directory. With a ``manifest``, an export already recorded for the report date (and
+    unchanged on disk) is reused instead of exporting again. A ``sink``
+    receives the export's bytes as they download (see ``download_and_analyze``).
+    """
+    recorded = manifest.completed('download') if manifest else None
+    if recorded:
+        print(f"⏭️ Reusing export from the run manifest: {recorded['data_path']}")
+        return recorded['data_path']
+    if client is None:
+        from tools.uniware_client import UniwareClient
+        client = UniwareClient()
+    # Check if credentials exist first
+    username = client.tokens.username
+    password = client.tokens.password
+
+    if not username or not password:
+        raise StageError("UNIWARE_USERNAME or UNIWARE_PASSWORD not found in .env file. Please add your Uniware credentials.")
+
+    print(f"🔐 Connecting to Uniware API ({client.tenant}) with username: {username}")
+    client.authenticate()
+    print("✅ Authentication successful")
+
+    # Incremental mode only exports what changed since the last successful run
+    store = _order_store(output_dir) if incremental_enabled() else None
+    month_start, window_end = export_window()
+    start = store.export_window_start(month_start) if store else month_start
+
+    print(f"📋 Creating export job for sales since {start.strftime('%Y-%m-%d')}...")
+    export_name = f"uniware_sales_{datetime.now().strftime('%Y-%m-%d')}.csv"
+    artifacts = _artifact_store(output_dir, client.tenant)
+    filename = artifacts.path_for(report_day().date(), export_name, client.tenant)
+    downloaded_file = fetch_orders(client, start, window_end, filename, server_filters=store is None, sink=sink)
+    artifacts.register('export', filename, report_day().date(), client.tenant)
+    if store:
+        downloaded_file = store.merge(downloaded_file, month_start, start, window_end)
+    if manifest:
+        manifest.record('download', {'data_path': downloaded_file, 'export_path': filename},
+                        {'tenant': client.tenant, 'window_start': start.isoformat(), 'window_end': window_end.isoformat()})
+    return downloaded_file
+
+
+def analyze_report(file_path: str = None, output_dir: str = None, as_of: date = None,
+                   manifest: RunManifest = None, cube: 'SalesCube' = None, update_rollups: bool = True,
+                   tenant: str = None) -> str:
+    """Build the channel summary workbook from an export and return its path.
+
+    ``as_of`` is the day the report covers (default yesterday); nothing else
+    in the analysis reads the clock. Without a ``file_path`` the input is the
+    run's own export (from the ``manifest``), the order store in incremental
+    mode, or the artifact store's export for the report day. With a
+    ``manifest`` the analysis is skipped when the export, the exclusion rules
+    and the report options are unchanged since it last ran.
+
+    Every table in the workbook is a slice of one ``SalesCube`` built in a
+    single pass over the rows and saved next to the report as
+    ``<report>.cube.npz``. A ``cube`` already built from ``file_path`` while
+    it downloaded (see ``download_and_analyze``) saves parsing the file again.
+    With ``update_rollups=False`` the stored rollups are only read for the
+    comparison columns, for callers that write them beforehand (backfill).
+    A ``tenant`` with an ``output_dir`` indexes the report in that directory's
+    artifact store, filed under the tenant.
+    """
+    import pandas as pd
+
+    from tools.analysis import build_report
+    from tools.columnar_cache import ColumnarCache, columnar_cache_enabled
+    from tools.exclusions import rules_path
+    from tools.report_writer import SUMMARY_SHEET, ReportWriter, detail_sheets_enabled, write_detail_sheets
+    from tools.rollup_store import comparison_columns, rollups_enabled
+    from tools.sales_cube import SalesCube, chunked_cube
+
+    if not file_path and manifest:
+        file_path = manifest.output('download', 'data_path')
+    # In incremental mode the order store holds the full month-to-date data
+    if not file_path and incremental_enabled() and os.path.exists(_order_store(output_dir).orders_path):
+        file_path = _order_store(output_dir).orders_path
+    artifacts = _artifact_store(output_dir, tenant)
+    if not file_path and artifacts:
+        file_path = artifacts.latest('export', report_day(as_of).date(), tenant)
+        if file_path:
+            print(f"No file path provided, using the indexed export: {file_path}")
+    if not file_path:
+        raise StageError(f"No CSV file path provided and no export indexed for {report_day(as_of):%Y-%m-%d}")
+
+    inputs = None
+    if manifest:
+        inputs = {
+            'source': file_path,
+            'source_sha256': file_digest(file_path),
+            'rules_sha256': file_digest(rules_path()),
+            'detail_sheets': detail_sheets_enabled(),
+            'rollups': rollups_enabled(),
+        }
+        recorded = manifest.completed('analysis', inputs)
+        if recorded:
+            print(f"⏭️ Export and rules unchanged, reusing report: {recorded['report_path']}")
+            return recorded['report_path']
+
+    print(f"Processing file: {file_path}")
+    previous_day = report_day(as_of)
+    today = previous_day + timedelta(days=1)
+    start_of_month = today.replace(day=1)
+
+    chunk_rows = int(os.getenv("ANALYSIS_CHUNK_ROWS", "0"))
+    if cube is not None:
+        # Parsed and aggregated while the export downloaded; any re-read of the file is chunked
+        df = None
+        chunk_rows = chunk_rows or DETAIL_BATCH_ROWS
+    else:
+        with span('parse', bytes=os.path.getsize(file_path)) as attrs:
+            if file_path.endswith('.pkl'):
+                attrs['source'] = 'order_store'
+                df = pd.read_pickle(file_path)
+            elif chunk_rows > 0:
+                # Bounded memory wins over the cache; parsing happens chunk by chunk inside chunked_cube
+                attrs['source'] = 'chunked_csv'
+                df = None
+            elif columnar_cache_enabled():
+                # Parse the CSV once; later reads only touch this month's row groups
+                attrs['source'] = 'columnar_cache'
+                # From the report day when it is the last of the previous month (a run on the 1st)
+                try:
+                    df = ColumnarCache.for_output_dir(output_dir).load(file_path, filters=[
+                        ('Created', '>=', pd.Timestamp(min(start_of_month, previous_day).date())),
+                        ('Created', '<', pd.Timestamp(today.date())),
+                    ])
+                except FileNotFoundError:
+                    # Evicted by a concurrent run between building and reading it
+                    print("ℹ️ Columnar cache file was evicted, parsing the CSV instead")
+                    attrs['source'] = 'csv'
+                    df = pd.read_csv(file_path)
+            else:
+                attrs['source'] = 'csv'
+                df = pd.read_csv(file_path)
+            if df is not None:
+                attrs['rows'] = len(df)
+
+        if df is None:
+            # Bounded-memory mode for large exports
+            with span('chunked_analysis', chunk_rows=chunk_rows):
+                cube = chunked_cube(file_path, previous_day, start_of_month, chunk_rows)
+        else:
+            cube = SalesCube.from_frame(df, previous_day, start_of_month)
+    totals = cube.channel_totals()
+    comparisons = None
+    if rollups_enabled():
+        with span('rollup') as attrs:
+            if update_rollups:
+                attrs['rows'] = refresh_rollups(cube, output_dir)
+            comparisons = comparison_columns(_rollup_store(output_dir), previous_day)
+    final_report = build_report(totals, previous_day, comparisons)
+
+    report_name = f'Troveas_Report_{previous_day.strftime("%Y-%m-%d")}.xlsx'
+    if artifacts:
+        # Filed next to its export when the export is indexed
+        tenant = tenant or artifacts.tenant_of(file_path)
+        output_filename = artifacts.path_for(previous_day.date(), report_name, tenant)
+    else:
+        output_filename = _output_path(report_name, output_dir)
+    with span('excel_write', rows=len(final_report)) as attrs:
+        with ReportWriter(output_filename) as writer:
+            writer.write_frame(SUMMARY_SHEET, final_report)
+            if detail_sheets_enabled():
+                columns, frames = _detail_frames(df, file_path, chunk_rows)
+                attrs['detail_rows'] = write_detail_sheets(writer, cube, columns, frames)
+        attrs['bytes'] = os.path.getsize(output_filename)
+    cube_path = f"{os.path.splitext(output_filename)[0]}.cube.npz"
+    cube.save(cube_path)
+    if artifacts:
+        artifacts.register('report', output_filename, previous_day.date(), tenant)
+        artifacts.register('cube', cube_path, previous_day.date(), tenant)
+    if manifest:
+        manifest.record('analysis', {'report_path': output_filename, 'cube_path': cube_path}, inputs)
+    return output_filename
+
+
+def refresh_rollups(cube: 'SalesCube', output_dir: str = None) -> int:
+    """Rewrite the stored per-day rollups for the cube's whole window; returns the rows written."""
+    # The cube's window, not the MTD one: on the 1st that is just the report day (the
+    # previous month's last), which the empty MTD window would never finalize
+    return _rollup_store(output_dir).replace_days(cube.first_day, cube.previous_day,
+                                                  cube.daily_channel_totals(whole_window=True))
+
+
+def overlap_enabled() -> bool:
+    return '--overlap' in sys.argv[1:] or env_flag("REPORT_OVERLAP")
+
+
+def download_and_analyze(client: 'UniwareClient' = None, manifest: RunManifest = None) -> tuple:
+    """Download the export and build the report with parsing overlapped with the transfer.
+
+    The download runs in a worker thread and feeds a ``ByteStream`` that this
+    thread parses and aggregates chunk by chunk, so the summary is ready
+    soon after the last byte arrives. The raw file is still written for
+    archival and the detail sheets. In incremental mode, when the manifest
+    already has the export, or whenever the stream becomes unusable (e.g. a
+    restarted or sharded download) the finished file is analysed as usual.
+
+    Returns ``(data_path, report_path)``.
+    """
+    if incremental_enabled() or (manifest and manifest.completed('download')):
+        data_path = download_report(client, manifest=manifest)
+        return data_path, analyze_report(data_path, manifest=manifest)
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    from tools.sales_cube import stream_cube
+    from tools.streaming import ByteStream, StreamUnavailable
+
+    previous_day = report_day()
+    start_of_month = (previous_day + timedelta(days=1)).replace(day=1)
+    chunk_rows = int(os.getenv("ANALYSIS_CHUNK_ROWS", "0")) or DETAIL_BATCH_ROWS
+    stream = ByteStream()
+
+    def download():
+        try:
+            return download_report(client, manifest=manifest, sink=stream)
+        except BaseException as e:
+            # Wake the parser if the export fails before or during the transfer
+            stream.fail(StreamUnavailable(f"download failed: {e}"))
+            raise
+
+    cube = None
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = submit(pool, download)
+        with span('stream_analysis', chunk_rows=chunk_rows) as attrs:
+            try:
+                cube = stream_cube(stream, previous_day, start_of_month, chunk_rows)
+                attrs['streamed'] = True
+            except StreamUnavailable as e:
+                attrs['streamed'] = False
+                print(f"ℹ️ Not analysing during the download ({e}); reading the file instead")
+            except Exception as e:
+                attrs['streamed'] = False
+                print(f"⚠️ Streaming analysis failed ({type(e).__name__}: {e}); reading the file instead")
+            finally:
+                stream.abandon()
+        data_path = future.result()
+    return data_path, analyze_report(data_path, manifest=manifest, cube=cube)
+
+
+def _detail_frames(df, file_path: str, chunk_rows: int) -> tuple:
+    """Report columns and the batches the detail sheets are filled from."""
+    import pandas as pd
+
+    from tools.analysis import report_chunks, report_columns
+
+    if df is None:
+        return report_columns(pd.read_csv(file_path, nrows=0).columns), report_chunks(file_path, chunk_rows)
+    batches = (df.iloc[i:i + DETAIL_BATCH_ROWS] for i in range(0, len(df), DETAIL_BATCH_ROWS))
+    return report_columns(df.columns), batches
+
+
+def _as_list(value) -> list:
+    if not value:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def _load_audiences(default_attachment: str) -> list:
+    """Extra ``(to, cc, subject, attachments)`` deliveries from ``REPORT_AUDIENCES``.
+
+    Each attachment entry is an explicit path; ``{report_date}`` is replaced
+    with the report day (``YYYY-MM-DD``). An audience without attachments gets
+    the report itself.
+    """
+    path = os.getenv("REPORT_AUDIENCES", AUDIENCES_FILE)
+    if not os.path.exists(path):
+        return []
+    import yaml
+
+    with open(path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+
+    report_date = f"{report_day():%Y-%m-%d}"
+    audiences = []
+    for name, spec in config.items():
+        to = _as_list(spec.get('to'))
+        if not to:
+            raise StageError(f"Audience '{name}' in {path} has no 'to' address.")
+        attachments = []
+        for entry in _as_list(spec.get('attachments')) or [default_attachment]:
+            attachment = entry.replace('{report_date}', report_date)
+            if not os.path.isfile(attachment):
+                raise StageError(f"Audience '{name}': attachment '{attachment}' does not exist.")
+            attachments.append(attachment)
+        audiences.append((to, _as_list(spec.get('cc')), spec.get('subject', REPORT_SUBJECT), attachments))
+    return audiences
+
+
+def _read_recipients(path: str) -> tuple:
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = f.read()
+    parts = [p.strip() for p in re.split(r'[\n,;]+', raw) if p.strip()]
+    return (parts[0], parts[1:]) if parts else (None, [])
+
+
+def send_report_email(file_path: str = None, mailer: MailDispatcher = None, manifest: RunManifest = None) -> tuple:
+    """Email the report; ``file_path`` may be the workbook or a recipients file.
+
+    A long-lived ``mailer`` (e.g. the scheduler's) is used as-is and closed
+    after the batch; otherwise one is created for this call. With a
+    ``manifest``, nothing is sent if the report date was already emailed
+    (unless forced), and the run's own report is the default attachment.
+
+    Returns the primary recipient and the attached file name.
+    """
+    sent = manifest.done('email') if manifest else None
+    if sent:
+        print(f"⏭️ Report for {manifest.report_date} was already emailed to {sent['recipient']}; use --force to send again")
+        return sent['recipient'], sent['filename']
+
+    sender_email, sender_password = smtp_credentials()
+
+    # Determine recipients (To + CC) from knowledge file
+    recipient_email = None
+    cc_emails: list[str] = []
+    potential_recipient_path = file_path if file_path else RECIPIENTS_FILE
+    try:
+        if potential_recipient_path and potential_recipient_path.lower().endswith('.txt') and os.path.exists(potential_recipient_path):
+            recipient_email, cc_emails = _read_recipients(potential_recipient_path)
+    except Exception:
+        pass
+
+    if not recipient_email and os.path.exists(RECIPIENTS_FILE):
+        recipient_email, cc_emails = _read_recipients(RECIPIENTS_FILE)
+
+    if not recipient_email:
+        raise StageError("Recipient email not found. Ensure 'knowledge/user_preference.txt' contains a valid email address.")
+
+    # Determine attachment path
+    attachment_path = None
+    if file_path and file_path.lower().endswith(('.xlsx', '.xls')) and os.path.exists(file_path):
+        attachment_path = file_path
+    elif manifest and manifest.output('analysis', 'report_path'):
+        attachment_path = manifest.output('analysis', 'report_path')
+    else:
+        attachment_path = ArtifactStore().latest('report', report_day().date())
+
+    if not attachment_path:
+        raise StageError(f"No Excel report found to attach. Expected an indexed 'Troveas_Report_{report_day():%Y-%m-%d}.xlsx'.")
+
+    compress_over = compress_threshold()
+    primary = build_message(sender_email, [recipient_email], cc_emails, REPORT_SUBJECT, EMAIL_BODY, [attachment_path], compress_over)
+    # Keyed by subject and recipients, so a re-run after a partial batch only sends what is missing
+    deliveries = [(f"{REPORT_SUBJECT}|{','.join([recipient_email] + cc_emails)}", primary, [recipient_email] + cc_emails)]
+    for to, cc, subject, attachments in _load_audiences(attachment_path):
+        deliveries.append((f"{subject}|{','.join(to + cc)}",
+                           build_message(sender_email, to, cc, subject, EMAIL_BODY, attachments, compress_over), to + cc))
+    already_sent = manifest.progress('email') if manifest else {}
+    pending = [delivery for delivery in deliveries if delivery[0] not in already_sent]
+    if len(pending) < len(deliveries):
+        print(f"⏭️ {len(deliveries) - len(pending)} message(s) for {manifest.report_date} were already sent; skipping them")
+
+    # Every audience goes out over the same authenticated connection
+    with mailer or MailDispatcher(sender_email, sender_password) as dispatcher:
+        def sent(index: int) -> None:
+            if manifest:
+                manifest.mark('email', pending[index][0], dispatcher.delivered[-1])
+
+        dispatcher.send_all([(msg, recipients) for _, msg, recipients in pending], on_sent=sent)
+    if len(pending) > 1:
+        print(f"📧 Sent {len(pending)} message(s) over one SMTP connection")
+
+    filename = os.path.basename(attachment_path)
+    if manifest:
+        manifest.record('email', {'recipient': recipient_email, 'filename': filename, 'messages': len(deliveries)},
+                        {'report_sha256': file_digest(attachment_path)})
+    return recipient_email, filename
+
+
+def cleanup_files(manifest: RunManifest = None) -> list:
+    """Archive the report day's exports and apply the artifact retention policy.
+
+    Exports are gzip-compressed in place; artifacts past ``ARTIFACT_RETENTION_DAYS``
+    or beyond ``ARTIFACT_MAX_MB`` are deleted, never the current day's.
+    Returns the deleted paths.
+    """
+    store = ArtifactStore()
+    day = report_day().date()
+    with span('cleanup') as attrs:
+        archived = store.archive(day)
+        for path in archived:
+            print(f"🗜️ Archived export: {path}")
+        deleted_files = store.enforce_retention(keep_report_date=day)
+        for path in deleted_files:
+            print(f"✅ Deleted expired artifact: {path}")
+        attrs.update(archived=len(archived), files=len(deleted_files))
+    if manifest:
+        manifest.record('cleanup', {'archived': archived, 'deleted': deleted_files})
+    return deleted_files
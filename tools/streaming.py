@@ -0,0 +1,141 @@
+"""
+In-process pipe between the export download and the analysis.
+
+The downloader feeds wire bytes into a ``ByteStream`` as they arrive (gzip is
+decoded on the fly) while the analysis reads the same stream as a file, so
+parsing and aggregation overlap the transfer instead of re-reading the file
+from disk afterwards. The stream is bounded, so a slow parser throttles
+nothing but memory use, and a reader that gives up never blocks the download.
+
+Whenever the bytes the reader has seen can no longer be trusted (the
+transfer restarted from zero, the export was sharded and merged on disk, the
+download failed) the reader gets ``StreamUnavailable`` and the caller falls
+back to analysing the finished file.
+"""
+
+import hashlib
+import io
+import queue
+import threading
+import zlib
+
+from tools.run_manifest import prime_digest
+
+
+class StreamUnavailable(Exception):
+    """The streamed bytes cannot be used; analyse the downloaded file instead."""
+
+
+class ByteStream(io.RawIOBase):
+    def __init__(self, max_chunks: int = 64):
+        super().__init__()
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._buffer = b''
+        self._eof = False
+        self._abandoned = threading.Event()
+        self._failed = False
+        self._decoder = None
+        self._received = 0
+        self._digest = hashlib.sha256()
+
+    # Writer side (the download thread)
+
+    def _put(self, item) -> None:
+        # Once the reader is gone nothing drains the queue; the bytes are only hashed
+        while not self._abandoned.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def begin(self, encoding: str, offset: int, part_path: str) -> None:
+        """Called before bytes from ``offset`` arrive; replays a resumed ``.part`` prefix."""
+        if self._failed:
+            return
+        if offset < self._received:
+            self.fail(StreamUnavailable("the download restarted from the beginning"))
+            return
+        if self._decoder is None and self._received == 0:
+            self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS) if encoding == 'gzip' else False
+        if offset > self._received:
+            # Bytes from an earlier, interrupted run that this reader has not seen yet
+            with open(part_path, 'rb') as f:
+                f.seek(self._received)
+                remaining = offset - self._received
+                while remaining > 0:
+                    chunk = f.read(min(remaining, 1024 * 1024))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    self.feed(chunk)
+
+    def feed(self, chunk: bytes) -> None:
+        if self._failed:
+            return
+        self._received += len(chunk)
+        data = self._decoder.decompress(chunk) if self._decoder else chunk
+        if data:
+            self._digest.update(data)
+            self._put(data)
+
+    def finish(self) -> None:
+        """All bytes received; the reader sees end-of-file once it has drained the queue."""
+        if self._failed:
+            return
+        if self._decoder:
+            data = self._decoder.flush()
+            if data:
+                self._digest.update(data)
+                self._put(data)
+        self._put(None)
+
+    def completed(self, path: str) -> None:
+        """The verified file is at ``path``; its hash is already known from the stream."""
+        if not self._failed:
+            prime_digest(path, self._digest.hexdigest())
+
+    def fail(self, error: Exception) -> None:
+        if not self._failed:
+            self._failed = True
+            self._put(error)
+
+    # Reader side (the analysis)
+
+    def abandon(self) -> None:
+        """The reader is done (or gave up); the download carries on without feeding it.
+
+        The stream itself stays valid, so the digest of the bytes still arriving
+        is completed and handed to ``completed``.
+        """
+        self._abandoned.set()
+
+    def readable(self) -> bool:
+        return True
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        item = self._queue.get()
+        if item is None:
+            self._eof = True
+            return False
+        if isinstance(item, Exception):
+            self._eof = True
+            raise item if isinstance(item, StreamUnavailable) else StreamUnavailable(str(item))
+        self._buffer += item
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer and self._fill():
+            pass
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+    def header(self) -> str:
+        """The first line, decoded, without consuming it."""
+        while b'\n' not in self._buffer and self._fill():
+            pass
+        return self._buffer.split(b'\n', 1)[0].decode('utf-8-sig').rstrip('\r')
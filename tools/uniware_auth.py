@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+from tools.fileio import write_json
+
+CLIENT_ID = 'my-trusted-client'
+# A lock file older than this was left by a crashed process
+STALE_LOCK_SECONDS = 30
+
+# Serializes cache updates between threads; the lock file does the same between processes
+_cache_lock = threading.Lock()
+
+
+class UniwareTokenManager:
+    """Caches Uniware OAuth tokens on disk and renews them with the refresh grant.
+
+    The password grant is only used when there is no cached token or the
+    refresh token has been rejected. The cache file is created with 0600
+    permissions and holds one entry per tenant/username pair; updates are
+    read-modify-write under a lock, so concurrent tenants and processes never
+    drop each other's entries.
+    """
+
+    def __init__(self, tenant: str, username: str = None, password: str = None,
+                 cache_path: str = None, refresh_margin: int = 300, session=None, base_url: str = None):
+        self.tenant = tenant
+        self.base_url = base_url or f"https://{tenant}.unicommerce.com"
+        self.username = username or os.getenv("UNIWARE_USERNAME")
+        self.password = password or os.getenv("UNIWARE_PASSWORD")
+        self.cache_path = cache_path or os.getenv(
+            "UNIWARE_TOKEN_CACHE", os.path.join(os.path.expanduser("~"), ".uniware", "token_cache.json")
+        )
+        self.refresh_margin = refresh_margin
+        self.http = session or requests
+
+    @property
+    def _key(self) -> str:
+        return f"{self.tenant}:{self.username}"
+
+    @property
+    def token_url(self) -> str:
+        return f"{self.base_url}/oauth/token"
+
+    def _load_cache(self) -> dict:
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @contextmanager
+    def _locked(self):
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        lock_path = self.cache_path + '.lock'
+        with _cache_lock:
+            while True:
+                try:
+                    fd = os.open(lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                    break
+                except FileExistsError:
+                    try:
+                        if time.time() - os.path.getmtime(lock_path) > STALE_LOCK_SECONDS:
+                            os.remove(lock_path)
+                            continue
+                    except OSError:
+                        continue
+                    time.sleep(0.05)
+            try:
+                yield
+            finally:
+                os.close(fd)
+                os.remove(lock_path)
+
+    def _write_cache(self, cache: dict) -> None:
+        write_json(self.cache_path, cache, mode=0o600)
+
+    def _save(self, token: dict) -> None:
+        with self._locked():
+            cache = self._load_cache()
+            cache[self._key] = token
+            self._write_cache(cache)
+
+    def _request_token(self, params: dict) -> dict:
+        response = self.http.get(self.token_url, params={'client_id': CLIENT_ID, **params}, timeout=30)
+        response.raise_for_status()
+        body = response.json()
+        token = {
+            'access_token': body['access_token'],
+            'refresh_token': body.get('refresh_token') or params.get('refresh_token'),
+            'expires_at': time.time() + int(body.get('expires_in', 3600)),
+        }
+        self._save(token)
+        return token
+
+    def get_token(self) -> str:
+        cached = self._load_cache().get(self._key)
+        if cached and cached.get('expires_at', 0) - self.refresh_margin > time.time():
+            return cached['access_token']
+        if cached and cached.get('refresh_token'):
+            try:
+                print("🔄 Renewing Uniware access token with refresh token")
+                return self._request_token({
+                    'grant_type': 'refresh_token',
+                    'refresh_token': cached['refresh_token'],
+                })['access_token']
+            except (requests.RequestException, KeyError, ValueError) as e:
+                print(f"⚠️ Token refresh failed, falling back to password grant: {e}")
+        return self._request_token({
+            'grant_type': 'password',
+            'username': self.username,
+            'password': self.password,
+        })['access_token']
+
+    def invalidate(self) -> None:
+        """Forget the cached token, e.g. after the API answers 401."""
+        with self._locked():
+            cache = self._load_cache()
+            if cache.pop(self._key, None) is not None:
+                self._write_cache(cache)
@@ -0,0 +1,225 @@
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tools.downloads import RETRY_STATUSES, download_file
+from tools.export_polling import ExportJobPoller
+from tools.fileio import atomic_path
+from tools.instrumentation import span, submit
+from tools.streaming import StreamUnavailable
+from tools.uniware_auth import UniwareTokenManager
+
+# Requested when the caller does not say which columns it reads
+DEFAULT_EXPORT_COLUMNS = ["saleOrderCode", "totalPrice", "created", "channel", "status", "SoiStatus", "shippingPackageStatusCode"]
+
+
+class UniwareClient:
+    """Single entry point for Uniware REST calls.
+
+    Owns one keep-alive ``requests.Session`` with a connection pool, applies
+    connect/read timeouts to every call, and retries idempotent requests on
+    connection errors, 429 and 5xx with exponential backoff (honouring
+    ``Retry-After``). Non-idempotent calls are only retried on 429, where the
+    server guarantees it did not act on the request.
+    """
+
+    def __init__(self, tenant: str = None, facility: str = None, username: str = None, password: str = None,
+                 pool_size: int = None, max_retries: int = 4, base_url: str = None):
+        self.tenant = tenant or os.getenv("UNIWARE_TENANT", "priyankdesigns")
+        self.facility = facility or os.getenv("UNIWARE_FACILITY", self.tenant)
+        # UNIWARE_BASE_URL points the client at a stand-in server such as benchmarks/mock_uniware.py
+        self.base_url = (base_url or os.getenv("UNIWARE_BASE_URL") or f"https://{self.tenant}.unicommerce.com").rstrip('/')
+        self.timeout = (
+            float(os.getenv("UNIWARE_CONNECT_TIMEOUT", "10")),
+            float(os.getenv("UNIWARE_READ_TIMEOUT", "60")),
+        )
+        self.max_retries = max_retries
+
+        pool_size = pool_size or int(os.getenv("UNIWARE_POOL_SIZE", "10"))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # Sent on every API call; kept off the session so pre-signed file URLs stay untouched
+        self.api_headers = {'Content-Type': 'application/json', 'facility': self.facility}
+        self.tokens = UniwareTokenManager(self.tenant, username, password, session=self, base_url=self.base_url)
+
+    def _retry_delay(self, response, attempt: int) -> float:
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return min(2 ** attempt, 30) * random.uniform(0.5, 1.0)
+
+    def request(self, method: str, url: str, idempotent: bool = True, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if not idempotent or last_attempt:
+                    raise
+                time.sleep(self._retry_delay(None, attempt))
+                continue
+            retryable = response.status_code == 429 or (idempotent and response.status_code in RETRY_STATUSES)
+            if retryable and not last_attempt:
+                delay = self._retry_delay(response, attempt)
+                print(f"⚠️ Uniware returned {response.status_code}, retrying in {delay:.1f}s...")
+                time.sleep(delay)
+                continue
+            response.raise_for_status()
+            return response
+
+    def get(self, url: str, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def authenticate(self) -> str:
+        with span('auth', tenant=self.tenant):
+            return self.tokens.get_token()
+
+    def _api_post(self, path: str, payload: dict, idempotent: bool = True) -> dict:
+        url = f"{self.base_url}{path}"
+        for retry_auth in (True, False):
+            headers = {**self.api_headers, 'Authorization': f'bearer {self.tokens.get_token()}'}
+            try:
+                return self.request('POST', url, idempotent=idempotent, headers=headers, data=json.dumps(payload)).json()
+            except requests.HTTPError as e:
+                # A revoked or expired token is dropped from the cache and fetched again once
+                if retry_auth and e.response is not None and e.response.status_code == 401:
+                    self.tokens.invalidate()
+                    continue
+                raise
+
+    def create_export_job(self, start: datetime, end: datetime, columns: list = None, filters: list = None) -> str:
+        """Start a one-time Sale Orders export and return its job code.
+
+        ``columns`` are Uniware export column ids (default ``DEFAULT_EXPORT_COLUMNS``);
+        ``filters`` are extra ``exportFilters`` entries sent with the date range.
+        """
+        payload = {
+            "exportJobTypeName": "Sale Orders",
+            "exportColums": list(columns or DEFAULT_EXPORT_COLUMNS),
+            # Use the documented string constant for one-time exports
+            "frequency": "ONETIME",
+            "exportFilters": [
+                {
+                    "id": "addedOn",
+                    "dateRange": {
+                        "start": start.strftime('%Y-%m-%dT00:00:00Z'),
+                        "end": end.strftime('%Y-%m-%dT00:00:00Z')
+                    }
+                }
+            ] + list(filters or [])
+        }
+        # Creating a job is not idempotent, so server errors are not retried
+        with span('job_create', span_days=(end - start).days):
+            return self._api_post("/services/rest/v1/export/job/create", payload, idempotent=False)['jobCode']
+
+    def get_report_url(self, job_code: str, span_days: int = None) -> str:
+        payload = {"jobCode": job_code}
+
+        def check_status():
+            with span('job_poll', job_code=job_code) as attrs:
+                result = self._api_post("/services/rest/v1/export/job/status", payload)
+                status = attrs['status'] = result.get('status')
+            print(f"📊 Status check: {status}")
+
+            if status in ['SUCCESSFUL', 'COMPLETE']:
+                file_path = result.get('filePath')
+                print(f"🔗 FilePath from API: {file_path}")
+                if file_path:
+                    return status, file_path
+                else:
+                    print("⚠️ Status is COMPLETE but filePath is missing!")
+                    print(f"📋 Full response: {json.dumps(result, indent=2)}")
+            elif status in ['FAILED', 'CANCELLED']:
+                raise Exception(f"Export job {job_code} ended with status {status}.")
+            return status, None
+
+        return ExportJobPoller().poll(check_status, span_days)
+
+    def download_report(self, url: str, filename: str, sink=None) -> str:
+        # Streams to disk in chunks and resumes interrupted transfers
+        with span('download') as attrs:
+            path = download_file(url, filename, session=self.session, timeout=self.timeout, sink=sink)
+            attrs['bytes'] = os.path.getsize(path)
+            return path
+
+    def export_sales_orders(self, start: datetime, end: datetime, filename: str,
+                            shard_days: int = None, concurrency: int = None,
+                            columns: list = None, filters: list = None, sink=None) -> str:
+        """Export, wait for and download sale orders added in ``[start, end)``.
+
+        ``columns`` and ``filters`` are passed to every export job. With
+        ``shard_days`` set, the window is split into sub-ranges whose jobs are
+        created, polled and downloaded concurrently (at most ``concurrency``
+        at a time), then merged into ``filename``. ``sink`` receives the bytes
+        of an unsharded download as they arrive.
+        """
+        if shard_days is None:
+            shard_days = int(os.getenv("UNIWARE_SHARD_DAYS", "0"))
+        if shard_days <= 0 or (end - start).days <= shard_days:
+            job_code = self.create_export_job(start, end, columns, filters)
+            print(f"📋 Job created with code: {job_code}")
+            print("⏳ Waiting for report generation...")
+            report_url = self.get_report_url(job_code, (end - start).days)
+            print("📥 Report ready, downloading...")
+            return self.download_report(report_url, filename, sink=sink)
+
+        if sink:
+            sink.fail(StreamUnavailable("sharded exports are merged on disk"))
+        shards = []
+        shard_start = start
+        while shard_start < end:
+            shard_end = min(shard_start + timedelta(days=shard_days), end)
+            shards.append((shard_start, shard_end))
+            shard_start = shard_end
+        concurrency = concurrency or int(os.getenv("UNIWARE_SHARD_CONCURRENCY", "3"))
+        print(f"🧩 Splitting export into {len(shards)} shard(s), {concurrency} at a time")
+
+        def run_shard(index: int, shard: tuple) -> str:
+            shard_start, shard_end = shard
+            job_code = self.create_export_job(shard_start, shard_end, columns, filters)
+            print(f"📋 Shard {index + 1}/{len(shards)} ({shard_start:%Y-%m-%d}..{shard_end:%Y-%m-%d}) job: {job_code}")
+            report_url = self.get_report_url(job_code, (shard_end - shard_start).days)
+            return self.download_report(report_url, f"{filename}.shard{index}")
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [submit(pool, run_shard, index, shard) for index, shard in enumerate(shards)]
+            shard_files = [future.result() for future in futures]
+        merge_shard_files(shard_files, filename)
+        for shard_file in shard_files:
+            os.remove(shard_file)
+        return filename
+
+
+def merge_shard_files(shard_files: list, filename: str) -> None:
+    """Concatenate shard CSVs, dropping orders already seen in an earlier shard.
+
+    Rows are per order item, so an order's rows are kept together from the
+    first shard that contains it rather than de-duplicated row by row.
+    """
+    import pandas as pd
+
+    seen = set()
+    header_written = False
+    with atomic_path(filename) as tmp_path:
+        for shard_file in shard_files:
+            shard = pd.read_csv(shard_file, dtype=str, keep_default_na=False)
+            if 'Sale Order Code' in shard.columns:
+                codes = shard['Sale Order Code']
+                shard = shard[~codes.isin(seen)]
+                seen.update(codes.unique())
+            shard.to_csv(tmp_path, mode='a' if header_written else 'w', header=not header_written, index=False)
+            header_written = True
+